@@ -1 +1,4 @@
 from .ants import AntsWithPheromones, AntsWithOrientation
+from .ant_colony import AntColonyWithPheromones, AntColonyWithOrientation
+from .event_log import AntEventLog, AntEventType, expand_ant_events
+from .random_streams import AntRandomStreams
@@ -4,9 +4,23 @@ from decimal import Decimal
 from environment import FoodSources, Nest
 from pheromones import Pheromones
 from settings import Settings, PheromoneReleaseType
+from ants.trajectory_history import create_trajectory_history
+
+# Decimal constants are exact copies of the float values
+PI = Decimal(math.pi)
+TWO_PI = Decimal(2 * math.pi)
+# quality of food when it does not affect pheromone amount or recruitment
+DEFAULT_FOOD_QUALITY = Decimal("0.75")
 
 
 class DetectedPheromones:
+    __slots__ = (
+        "left_antennae",
+        "left_antennae_normalized",
+        "right_antennae",
+        "right_antennae_normalized",
+    )
+
     def __init__(self) -> None:
         self.left_antennae = Decimal(0)
         self.left_antennae_normalized = Decimal(0)
@@ -21,6 +35,25 @@ class AntBaseClass:
     During implementation, it is necessary to define the get_next_position method.
     """
 
+    __slots__ = (
+        "settings",
+        "name",
+        "created_at_step",
+        "previous_position_x",
+        "previous_position_y",
+        "current_position_x",
+        "current_position_y",
+        "current_direction",
+        "current_detected_pheromones",
+        "trajectory_history",
+        "looking_for_food",
+        "found_food",
+        "is_recruiter",
+        "examine_food_in_steps",
+        "recruit_ants_number",
+        "pheromone_deposit_limit",
+    )
+
     def __init__(
         self,
         settings: Settings,
@@ -32,7 +65,11 @@ class AntBaseClass:
         pheromone_deposit_limit: int = None,
         is_recruiter: bool = False,
         created_at_step: int = 0,
+        number_of_steps: int = 0,
     ):
+        """
+        number_of_steps: expected number of steps of the ant (preallocation of history)
+        """
         self.settings = settings
         self.name = str(name)
         self.created_at_step = created_at_step
@@ -46,21 +83,18 @@ class AntBaseClass:
         self.current_direction = Decimal(initial_direction)
         self.current_detected_pheromones = DetectedPheromones()
 
-        self.position_x_history = [initial_position_x]
-        self.position_y_history = [initial_position_y]
+        # None if disabled (settings.TRAJECTORY_HISTORY_TYPE)
+        self.trajectory_history = create_trajectory_history(settings, number_of_steps)
+        if self.trajectory_history is not None:
+            self.trajectory_history.append(
+                self.current_position_x, self.current_position_y
+            )
 
         # Boolean
         self.looking_for_food = looking_for_food
         # FoodSource, food that the ant has found and is heading with it to the nest
         self.found_food = None
 
-        # for every step: None or food id
-        self.found_food_in_steps = [None] * (created_at_step + 1)
-        # for every step: Boolean
-        self.found_nest_in_steps = [False] * (created_at_step + 1)
-        # for every step: number of recruited ants (if the ant is a recruiter)
-        self.recruited_ants_in_steps = []
-
         self.is_recruiter = is_recruiter
         self.examine_food_in_steps = 0
         self.recruit_ants_number = 0
@@ -97,7 +131,7 @@ class AntBaseClass:
         }
 
     def get_ant_final_results(self):
-        return {
+        results = {
             "name": str(self.name),
             "created_at_step": str(self.created_at_step),
             "x": str(self.current_position_x),
@@ -107,14 +141,13 @@ class AntBaseClass:
             "direction": str(self.current_direction),
             "looking_for_food": self.looking_for_food,
             "pheromone_deposit_limit": str(self.pheromone_deposit_limit),
-            "found_food_in_steps": self.found_food_in_steps,
-            "found_nest_in_steps": self.found_nest_in_steps,
             "is_recruiter": str(self.is_recruiter),
             "examine_food_in_steps": self.examine_food_in_steps,
             "recruit_ants_number": self.recruit_ants_number,
         }
-
-        # 'position_x_history': self.position_x_history, 'position_y_history': self.position_y_history}
+        if self.trajectory_history is not None:
+            results["trajectory"] = self.trajectory_history.get_positions().tolist()
+        return results
 
     def get_previous_position(self):
         return [self.previous_position_x, self.previous_position_y]
@@ -150,11 +183,10 @@ class AntBaseClass:
         if self.looking_for_food:
             return self.settings.AMOUNT_OF_PHEROMONE_NEST_MARK
         else:
-            # TODO: move 0.75 to constant
             return self.settings.AMOUNT_OF_PHEROMONE_FOOD_MARK * (
                 self.found_food.quality
                 if self.settings.AFFECT_PHEROMONE_AMOUNT
-                else Decimal(0.75)
+                else DEFAULT_FOOD_QUALITY
             )
 
     def is_position_relevant(self, position):
@@ -178,33 +210,27 @@ class AntBaseClass:
             return self.get_current_position(), None
         return self.get_previous_position(), self.current_direction
 
+    # position, direction and amount of released pheromone, None if nothing is released
+    def get_pheromone_deposit(self):
+        if self.pheromone_deposit_limit <= 0:
+            return None
+        self.pheromone_deposit_limit -= 1
+        # do not spread pheromone, if ant is not in monitored area
+        if not self.is_road_relevant():
+            return None
+        (
+            position,
+            direction,
+        ) = self.get_position_and_direction_to_spread_pheromone()
+        return position, direction, self.get_amount_of_pheromone_for_deposition()
+
     def spread_pheromones(self, pheromones: Pheromones, type: PheromoneReleaseType):
-        if self.pheromone_deposit_limit > 0:
-            # do not spread pheromone, if ant is not in monitored area
-            if self.is_road_relevant():
-                (
-                    position,
-                    direction,
-                ) = self.get_position_and_direction_to_spread_pheromone()
-                amount = self.get_amount_of_pheromone_for_deposition()
-
-                if type == PheromoneReleaseType.GAUSSIAN:
-                    pheromones.add_pheromone_to_road(
-                        position, direction, self.looking_for_food, amount=amount
-                    )
-                elif type == PheromoneReleaseType.POSITION:
-                    pheromones.add_pheromone_to_position(
-                        position, direction, self.looking_for_food, amount=amount
-                    )
-                elif type == PheromoneReleaseType.NEAREST_GRID_POINT:
-                    pheromones.add_pheromone_to_nearest_grid_point(
-                        position, direction, self.looking_for_food, amount=amount
-                    )
-                else:
-                    raise NotImplementedError(
-                        'Unknown pheromone release type "' + str(type) + '".'
-                    )
-            self.pheromone_deposit_limit -= 1
+        deposit = self.get_pheromone_deposit()
+        if deposit is not None:
+            [position, direction, amount] = deposit
+            pheromones.add_pheromone(
+                type, position, direction, self.looking_for_food, amount
+            )
 
     def normalize_pheromone_value(self, pheromone_value: Decimal):
         if pheromone_value < self.settings.MINIMUM_DETECTABLE_PHEROMONE:
@@ -222,6 +248,11 @@ class AntBaseClass:
             right_position, self.looking_for_food
         )
 
+        self.set_detected_pheromone_values(left_pheromone, righ_pheromone)
+
+    def set_detected_pheromone_values(self, left_pheromone, righ_pheromone):
+        left_pheromone = Decimal(left_pheromone)
+        righ_pheromone = Decimal(righ_pheromone)
         self.current_detected_pheromones.left_antennae = left_pheromone
         self.current_detected_pheromones.left_antennae_normalized = (
             self.normalize_pheromone_value(left_pheromone)
@@ -272,25 +303,27 @@ class AntBaseClass:
             * (self.settings.STANDARD_DEVIATION_OF_RANDOM_CHANGE ** Decimal("2"))
         )
 
-    def get_next_position(self, pheromones, random_variable_value):
+    def get_next_position(
+        self, pheromones, random_variable_value, homing_direction=None
+    ):
         raise NotImplementedError
 
     @staticmethod
     def normalize_ant_direction(direction: Decimal):
-        while direction > Decimal(2 * math.pi):
-            direction -= Decimal(2 * math.pi)
+        while direction > TWO_PI:
+            direction -= TWO_PI
         while direction < 0:
-            direction += Decimal(2 * math.pi)
+            direction += TWO_PI
         return direction
 
     def turn_around(self):
-        if self.current_direction > Decimal(math.pi):
+        if self.current_direction > PI:
             self.current_direction = self.normalize_ant_direction(
-                self.current_direction - Decimal(math.pi)
+                self.current_direction - PI
             )
         else:
             self.current_direction = self.normalize_ant_direction(
-                self.current_direction + Decimal(math.pi)
+                self.current_direction + PI
             )
 
     def move_with_direction(self, direction: Decimal, step: int):
@@ -307,22 +340,33 @@ class AntBaseClass:
         foods: FoodSources,
         nest: Nest,
         random_variable_value: Decimal,
+        detected_pheromone_values: list = None,
+        homing_direction: Decimal = None,
     ):
+        """
+        detected_pheromone_values: [left, right] antennae values sampled in advance,
+        if None, pheromones are sampled by the ant
+        homing_direction: next direction of ant returning to the nest computed
+        in advance (AntWithOrientation)
+        Returns [found food (FoodSource or None), found nest (Boolean)] in this step.
+        """
         if self.examine_food_in_steps > 0:
             self.examine_food_in_steps -= 1
 
-            self.found_food_in_steps.append(None)
-            self.found_nest_in_steps.append(False)
-
             self.previous_position_x, self.previous_position_y = (
                 self.current_position_x,
                 self.current_position_y,
             )
 
-            return
+            return [None, False]
+
+        if detected_pheromone_values is None:
+            self.set_detected_pheromones(pheromones=pheromones)
+        else:
+            self.set_detected_pheromone_values(*detected_pheromone_values)
 
         [next_position_x, next_position_y, next_direction] = self.get_next_position(
-            pheromones, random_variable_value
+            pheromones, random_variable_value, homing_direction=homing_direction
         )
 
         self.previous_position_x, self.previous_position_y = (
@@ -335,8 +379,10 @@ class AntBaseClass:
         )
         self.current_direction = next_direction
 
-        self.position_x_history.append(self.current_position_x)
-        self.position_y_history.append(self.current_position_y)
+        if self.trajectory_history is not None:
+            self.trajectory_history.append(
+                self.current_position_x, self.current_position_y
+            )
 
         found_food = self.looking_for_food is True and foods.find_food(
             next_position_x, next_position_y, step
@@ -361,18 +407,14 @@ class AntBaseClass:
             self.turn_around()
 
             if self.is_recruiter:
-                # TODO: move 0.75 to constant
                 self.recruit_ants_number = int(
                     self.settings.MAX_RECRUITED_ANTS_AT_ONCE
                     * (
                         self.found_food.quality
                         if self.found_food.affect_recruitment
-                        else Decimal("0.75")
+                        else DEFAULT_FOOD_QUALITY
                     )
                 )
             self.found_food = None
 
-        self.found_food_in_steps.append(found_food.id if found_food else None)
-        self.found_nest_in_steps.append(found_nest)
-
-        return
+        return [found_food or None, found_nest]
@@ -0,0 +1,523 @@
+import math
+from decimal import Decimal
+import numpy as np
+
+from ants.ant_base_class import DEFAULT_FOOD_QUALITY
+from ants.ants import DetectedPheromonesStats
+from ants.event_log import AntEventLog, AntEventType
+from ants.random_streams import AntRandomStreams
+from ants.trajectory_history import create_colony_trajectory_history
+from ants.homing import get_homing_directions
+from ants.kinematics import (
+    create_trig_table,
+    get_antennae_positions,
+    get_next_positions,
+    normalize_ant_directions,
+    turn_around_directions,
+)
+from environment import FoodSources, Nest
+from pheromones import Pheromones
+from settings import Settings
+
+
+class _AntColony:
+    """
+    Ants stored in arrays (one array per attribute), all ants are moved at once.
+    Behaves like _Ants with AntBaseClass ants, but values are floats.
+    Ant names are indices into the arrays.
+    During implementation, it is necessary to define the get_next_directions method.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        random_variable_values: list,
+        ants: dict = None,
+        random_streams: AntRandomStreams = None,
+        number_of_steps: int = 0,
+    ):
+        """
+        random_streams: if set, random values are taken from the streams
+        instead of random_variable_values
+        number_of_steps: expected number of steps (preallocation of stats and history)
+        """
+        self.settings = settings
+        self.number_of_steps = number_of_steps
+        self.amount = settings.ANTS_NUMBER
+        self.random_variable_values = random_variable_values or []
+        self.random_streams = random_streams
+        self.available_ants = self.settings.AVAILABLE_ANTS
+        self.current_step = 0
+        self.detected_pheromones = {
+            "real_value": DetectedPheromonesStats(number_of_steps),
+            "normalized_value": DetectedPheromonesStats(number_of_steps),
+        }
+
+        self.step_length = float(settings.STEP_LENGTH)
+        self.antennae_length = float(settings.ANTENNAE_LENGTH)
+        self.left_antennae_angle = float(settings.LEFT_ANTENNAE_ANGLE)
+        self.right_antennae_angle = float(settings.RIGHT_ANTENNAE_ANGLE)
+        self.minimum_detectable_pheromone = float(settings.MINIMUM_DETECTABLE_PHEROMONE)
+        self.weber_law_threshold = float(settings.WEBER_LAW_THRESHOLD)
+        self.pheromone_c_minimum = float(settings.PHEROMONE_C_MINIMUM)
+        self.min_k_value = float(settings.MIN_K_VALUE)
+        self.random_change_variance = float(
+            settings.STANDARD_DEVIATION_OF_RANDOM_CHANGE ** Decimal("2")
+        )
+        self.trig_table = create_trig_table(settings.TRIG_TABLE_SIZE)
+
+        self.event_log = AntEventLog()
+
+        # slots for all ants which can be recruited are allocated at the beginning,
+        # first number_of_ants slots are active
+        self.number_of_ants = 0
+        if ants is None:
+            self.allocate_ants(self.amount + self.available_ants)
+            self.create_initial_ants(settings)
+        else:
+            self.allocate_ants(len(ants) + self.available_ants)
+            self.create_ants_from_data(settings, ants)
+
+    def allocate_ants(self, capacity: int):
+        self.position_x = np.zeros(capacity)
+        self.position_y = np.zeros(capacity)
+        self.previous_position_x = np.zeros(capacity)
+        self.previous_position_y = np.zeros(capacity)
+        self.direction = np.zeros(capacity)
+        self.looking_for_food = np.ones(capacity, dtype=bool)
+        self.pheromone_deposit_limit = np.full(
+            capacity, self.settings.PHEROMONE_DEPOSIT_LIMIT
+        )
+        self.is_recruiter = np.zeros(capacity, dtype=bool)
+        self.created_at_step = np.zeros(capacity, dtype=int)
+        self.examine_food_in_steps = np.zeros(capacity, dtype=int)
+        self.recruit_ants_number = np.zeros(capacity, dtype=int)
+        # id of food that the ant is heading with to the nest, -1 if none
+        self.found_food = np.full(capacity, -1)
+        self.found_food_quality = np.zeros(capacity)
+        # last detected values, columns: left, right, left normalized, right normalized
+        self.detected_pheromone_values = np.zeros((capacity, 4))
+        # None if disabled (settings.TRAJECTORY_HISTORY_TYPE)
+        self.trajectory_history = create_colony_trajectory_history(
+            self.settings, capacity, self.number_of_steps
+        )
+
+    def add_ants(
+        self,
+        position_x: np.ndarray,
+        position_y: np.ndarray,
+        direction: np.ndarray,
+        is_recruiter: np.ndarray,
+        created_at_step: int = 0,
+    ):
+        """
+        Activates next free slots, other attributes keep their initial values.
+        """
+        ants = slice(self.number_of_ants, self.number_of_ants + len(position_x))
+        self.position_x[ants] = position_x
+        self.position_y[ants] = position_y
+        self.previous_position_x[ants] = position_x
+        self.previous_position_y[ants] = position_y
+        self.direction[ants] = direction
+        self.is_recruiter[ants] = is_recruiter
+        self.created_at_step[ants] = created_at_step
+        if self.trajectory_history is not None:
+            self.trajectory_history.append(
+                np.arange(ants.start, ants.stop), position_x, position_y
+            )
+        self.number_of_ants += len(position_x)
+
+    def generate_division_of_recruiters(self):
+        recruitment_ratio = self.settings.RECRUITMENT_RATIO
+        arr = np.array([False] * self.amount)
+        arr[: int(self.amount * recruitment_ratio)] = True
+        np.random.shuffle(arr)
+        return arr
+
+    def create_initial_ants(self, settings: Settings):
+        [nest_x, nest_y, nest_radius] = [
+            float(value) for value in settings.NEST_POSITION
+        ]
+        angles = np.arange(self.amount) * (2 * math.pi / self.amount)
+        self.add_ants(
+            nest_x + nest_radius * np.cos(angles),
+            nest_y + nest_radius * np.sin(angles),
+            angles,
+            self.generate_division_of_recruiters(),
+        )
+
+    # for analysis purpose only
+    def create_ants_from_data(self, setting: Settings, ants):
+        ants_data = list(ants.values())
+        self.add_ants(
+            [float(ant_data.get("x")) for ant_data in ants_data],
+            [float(ant_data.get("y")) for ant_data in ants_data],
+            [float(ant_data.get("direction")) for ant_data in ants_data],
+            [str(ant_data.get("is_recruiter")) == "True" for ant_data in ants_data],
+        )
+
+    def get_current_ant_data(self, index: int):
+        return {
+            "x": str(float(self.position_x[index])),
+            "y": str(float(self.position_y[index])),
+            "previous_x": str(float(self.previous_position_x[index])),
+            "previous_y": str(float(self.previous_position_y[index])),
+            "direction": str(float(self.direction[index])),
+            "looking_for_food": bool(self.looking_for_food[index]),
+            "pheromone_deposit_limit": str(self.pheromone_deposit_limit[index]),
+            "is_recruiter": str(bool(self.is_recruiter[index])),
+            "recruit_ants_number": int(self.recruit_ants_number[index]),
+        }
+
+    def get_current_ants_data(self, start: int = 0):
+        return {
+            str(index): self.get_current_ant_data(index)
+            for index in range(start, self.number_of_ants)
+        }
+
+    def get_ants_final_results(self):
+        results = {}
+        for index in range(self.number_of_ants):
+            results[str(index)] = {
+                "name": str(index),
+                "created_at_step": str(self.created_at_step[index]),
+                "x": str(float(self.position_x[index])),
+                "y": str(float(self.position_y[index])),
+                "previous_x": str(float(self.previous_position_x[index])),
+                "previous_y": str(float(self.previous_position_y[index])),
+                "direction": str(float(self.direction[index])),
+                "looking_for_food": bool(self.looking_for_food[index]),
+                "pheromone_deposit_limit": str(self.pheromone_deposit_limit[index]),
+                "is_recruiter": str(bool(self.is_recruiter[index])),
+                "examine_food_in_steps": int(self.examine_food_in_steps[index]),
+                "recruit_ants_number": int(self.recruit_ants_number[index]),
+            }
+            if self.trajectory_history is not None:
+                results[str(index)]["trajectory"] = (
+                    self.trajectory_history.get_positions(index).tolist()
+                )
+        return results
+
+    def get_ant_events_data(self):
+        return self.event_log.get_events_data()
+
+    def get_ants_stats(self):
+        return {
+            "pheromones": {
+                "real_values": self.detected_pheromones["real_value"].get_results(),
+                "normalized_values": self.detected_pheromones[
+                    "normalized_value"
+                ].get_results(),
+            }
+        }
+
+    def get_random_variable_values(self, step: int, number: int):
+        """
+        Same values in the same order as number of calls of
+        _Ants.get_random_variable_value (values are popped from the end of the list),
+        or values of ants from random_streams.
+        """
+        if self.random_streams is not None:
+            return self.random_streams.get_values(step, number)
+
+        values = []
+        while len(values) < number:
+            if len(self.random_variable_values) == 0:
+                self.random_variable_values = np.random.normal(
+                    0, 1, self.settings.ANTS_NUMBER * 300
+                ).tolist()
+            count = min(number - len(values), len(self.random_variable_values))
+            values += self.random_variable_values[-count:][::-1]
+            del self.random_variable_values[-count:]
+        return np.array(values, dtype=float)
+
+    def get_amounts_of_pheromone_for_deposition(self, ants: np.ndarray):
+        qualities = (
+            self.found_food_quality[ants]
+            if self.settings.AFFECT_PHEROMONE_AMOUNT
+            else float(DEFAULT_FOOD_QUALITY)
+        )
+        return np.where(
+            self.looking_for_food[ants],
+            float(self.settings.AMOUNT_OF_PHEROMONE_NEST_MARK),
+            float(self.settings.AMOUNT_OF_PHEROMONE_FOOD_MARK) * qualities,
+        )
+
+    def is_position_relevant(self, x: np.ndarray, y: np.ndarray):
+        size = self.settings.ENVIRONMENT_SIZE
+        return (0 <= x) & (x <= size) & (0 <= y) & (y <= size)
+
+    def spread_pheromones(self, pheromones: Pheromones):
+        """
+        Same deposits as AntBaseClass.get_pheromone_deposit of every ant.
+        """
+        ants = slice(0, self.number_of_ants)
+        has_limit = self.pheromone_deposit_limit[ants] > 0
+        self.pheromone_deposit_limit[ants][has_limit] -= 1
+        # do not spread pheromone, if ant is not in monitored area
+        is_road_relevant = self.is_position_relevant(
+            self.position_x[ants], self.position_y[ants]
+        ) | self.is_position_relevant(
+            self.previous_position_x[ants], self.previous_position_y[ants]
+        )
+        ants = np.flatnonzero(has_limit & is_road_relevant)
+        if len(ants) == 0:
+            return
+
+        # if the ant did not move, pheromone is released on position without direction
+        directions = self.direction[ants].copy()
+        directions[
+            (self.position_x[ants] == self.previous_position_x[ants])
+            & (self.position_y[ants] == self.previous_position_y[ants])
+        ] = np.nan
+        positions = np.column_stack(
+            (self.previous_position_x[ants], self.previous_position_y[ants])
+        )
+
+        pheromones.deposit_batch(
+            positions,
+            directions,
+            self.get_amounts_of_pheromone_for_deposition(ants),
+            self.looking_for_food[ants],
+        )
+
+    def set_detected_pheromones(self, ants: np.ndarray, pheromones: Pheromones):
+        positions = get_antennae_positions(
+            self.position_x[ants],
+            self.position_y[ants],
+            self.direction[ants],
+            self.antennae_length,
+            self.left_antennae_angle,
+            self.right_antennae_angle,
+            self.trig_table,
+        )
+
+        values = np.asarray(
+            pheromones.get_watched_pheromone_values(
+                positions, np.repeat(self.looking_for_food[ants], 2)
+            ),
+            dtype=float,
+        ).reshape(len(ants), 2)
+        normalized_values = np.where(
+            values < self.minimum_detectable_pheromone, 0.0, values
+        )
+        self.detected_pheromone_values[ants] = np.hstack((values, normalized_values))
+
+    def save_detected_pheromones(self):
+        values = self.detected_pheromone_values[: self.number_of_ants]
+        self.detected_pheromones["real_value"].add_detected_pheromones(
+            values[:, 0], values[:, 1]
+        )
+        self.detected_pheromones["normalized_value"].add_detected_pheromones(
+            values[:, 2], values[:, 3]
+        )
+
+    def deterministic_moves(self, ants: np.ndarray):
+        c_left = self.detected_pheromone_values[ants, 2]
+        c_right = self.detected_pheromone_values[ants, 3]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gama = np.abs(c_left - c_right) / (c_left + c_right)
+
+        result = np.where(c_left > c_right, math.pi / 6, -math.pi / 6)
+        result[(c_left == c_right) | (gama <= self.weber_law_threshold)] = 0
+        return result
+
+    def stochastic_moves(self, ants: np.ndarray, random_variable_values: np.ndarray):
+        c_max = np.maximum(
+            self.detected_pheromone_values[ants, 2],
+            self.detected_pheromone_values[ants, 3],
+        )
+        with np.errstate(divide="ignore"):
+            k = np.minimum(
+                1.0, np.maximum(self.min_k_value, self.pheromone_c_minimum / c_max)
+            )
+        k[c_max == 0] = 1.0
+        return k * random_variable_values * self.random_change_variance
+
+    def get_next_directions(self, ants: np.ndarray, random_variable_values):
+        raise NotImplementedError
+
+    def move_all(
+        self, step: int, pheromones: Pheromones, foods: FoodSources, nest: Nest
+    ):
+        self.detected_pheromones["real_value"].add_new_step()
+        self.detected_pheromones["normalized_value"].add_new_step()
+
+        random_variable_values = self.get_random_variable_values(
+            step, self.number_of_ants
+        )
+
+        active_ants = slice(0, self.number_of_ants)
+        is_examining = self.examine_food_in_steps[active_ants] > 0
+        self.examine_food_in_steps[active_ants][is_examining] -= 1
+        ants = np.flatnonzero(~is_examining)
+
+        self.previous_position_x[active_ants] = self.position_x[active_ants]
+        self.previous_position_y[active_ants] = self.position_y[active_ants]
+
+        self.set_detected_pheromones(ants, pheromones)
+        next_directions = self.get_next_directions(ants, random_variable_values[ants])
+        [self.position_x[ants], self.position_y[ants]] = get_next_positions(
+            self.position_x[ants],
+            self.position_y[ants],
+            next_directions,
+            self.step_length,
+            self.trig_table,
+        )
+        self.direction[ants] = next_directions
+        if self.trajectory_history is not None:
+            self.trajectory_history.append(
+                ants, self.position_x[ants], self.position_y[ants]
+            )
+
+        looking_for_food = ants[self.looking_for_food[ants]]
+        found_food = foods.find_food_batch(
+            self.position_x[looking_for_food],
+            self.position_y[looking_for_food],
+            step,
+        )
+        heading_to_nest = ants[~self.looking_for_food[ants]]
+        found_nest = heading_to_nest[
+            nest.found_nest_batch(
+                self.position_x[heading_to_nest], self.position_y[heading_to_nest]
+            )
+        ]
+
+        self.process_found_food(
+            looking_for_food[found_food >= 0], found_food[found_food >= 0], foods
+        )
+        self.process_found_nest(found_nest, foods, nest)
+
+        self.event_log.add_events(
+            step,
+            looking_for_food[found_food >= 0],
+            AntEventType.FOUND_FOOD,
+            found_food[found_food >= 0],
+        )
+        self.event_log.add_events(step, found_nest, AntEventType.FOUND_NEST)
+        self.save_detected_pheromones()
+
+        results = self.get_current_ants_data()
+        results.update(self.recruit_new_ants())
+
+        self.current_step += 1
+
+        return results
+
+    def process_found_food(
+        self, ants: np.ndarray, found_food: np.ndarray, foods: FoodSources
+    ):
+        self.looking_for_food[ants] = False
+        self.pheromone_deposit_limit[ants] = self.settings.PHEROMONE_DEPOSIT_LIMIT
+        self.direction[ants] = turn_around_directions(self.direction[ants])
+        self.found_food[ants] = found_food
+        self.found_food_quality[ants] = [
+            float(foods.foods[food_id].quality) for food_id in found_food
+        ]
+
+        recruiters = ants[self.is_recruiter[ants]]
+        self.examine_food_in_steps[recruiters] = self.settings.TIME_OF_FOOD_EXAMINATION
+
+    def process_found_nest(self, ants: np.ndarray, foods: FoodSources, nest: Nest):
+        for index in ants:
+            food = foods.foods[self.found_food[index]]
+            nest.add_food(food.quality)
+
+            if self.is_recruiter[index]:
+                self.recruit_ants_number[index] = int(
+                    self.settings.MAX_RECRUITED_ANTS_AT_ONCE
+                    * (
+                        food.quality
+                        if food.affect_recruitment
+                        else DEFAULT_FOOD_QUALITY
+                    )
+                )
+
+        self.looking_for_food[ants] = True
+        self.pheromone_deposit_limit[ants] = self.settings.PHEROMONE_DEPOSIT_LIMIT
+        self.direction[ants] = turn_around_directions(self.direction[ants])
+        self.found_food[ants] = -1
+
+    def recruit_new_ants(self):
+        """
+        Same recruitment as _Ants.recruit_new_ants, recruits are activated at once.
+        """
+        if self.available_ants < 1:
+            return {}
+        recruiters = np.flatnonzero(self.recruit_ants_number[: self.number_of_ants])
+        if len(recruiters) == 0:
+            return {}
+
+        # recruiters are served in order until available ants run out
+        requested = self.recruit_ants_number[recruiters]
+        available_before = self.available_ants - (np.cumsum(requested) - requested)
+        is_served = available_before >= 1
+        served_recruiters = recruiters[is_served]
+        new_ants_numbers = np.minimum(requested[is_served], available_before[is_served])
+        # new ants are placed at positions of their recruiters
+        sources = np.repeat(served_recruiters, new_ants_numbers)
+
+        self.recruit_ants_number[served_recruiters] = 0
+        self.available_ants -= len(sources)
+        number_of_ants = self.number_of_ants
+
+        if not is_served.all():
+            # as in _Ants.recruit_new_ants, ants recruited in this step are
+            # returned in results, but they are not added to the colony
+            self.amount = number_of_ants + len(sources)
+            return {
+                str(number_of_ants + recruit_index): self.get_new_ant_data(source)
+                for recruit_index, source in enumerate(sources)
+            }
+
+        self.add_ants(
+            self.position_x[sources],
+            self.position_y[sources],
+            self.direction[sources],
+            False,
+            created_at_step=self.current_step,
+        )
+        self.amount = self.number_of_ants
+        return self.get_current_ants_data(start=number_of_ants)
+
+    def get_new_ant_data(self, recruiter: int):
+        x = str(float(self.position_x[recruiter]))
+        y = str(float(self.position_y[recruiter]))
+        return {
+            "x": x,
+            "y": y,
+            "previous_x": x,
+            "previous_y": y,
+            "direction": str(float(self.direction[recruiter])),
+            "looking_for_food": True,
+            "pheromone_deposit_limit": str(self.settings.PHEROMONE_DEPOSIT_LIMIT),
+            "is_recruiter": str(False),
+            "recruit_ants_number": 0,
+        }
+
+
+class AntColonyWithPheromones(_AntColony):
+    def get_next_directions(self, ants: np.ndarray, random_variable_values):
+        direction_changes = self.deterministic_moves(ants) + self.stochastic_moves(
+            ants, random_variable_values
+        )
+        return self.direction[ants] + normalize_ant_directions(direction_changes)
+
+
+class AntColonyWithOrientation(_AntColony):
+    def get_next_directions(self, ants: np.ndarray, random_variable_values):
+        looking_for_food = self.looking_for_food[ants]
+        direction_changes = self.deterministic_moves(ants) + self.stochastic_moves(
+            ants, random_variable_values
+        )
+        next_directions = self.direction[ants] + direction_changes
+
+        directions_to_nest = get_homing_directions(
+            self.position_x[ants],
+            self.position_y[ants],
+            self.settings.NEST_POSITION,
+            float(self.settings.ORIENTATION_RANDOMNESS),
+            random_variable_values,
+        )
+        return np.where(looking_for_food, next_directions, directions_to_nest)
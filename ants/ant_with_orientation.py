@@ -7,6 +7,8 @@ from pheromones import Pheromones
 
 
 class AntWithOrientation(AntBaseClass):
+    __slots__ = ()
+
     def get_nest_center_position(self):
         return [self.settings.NEST_POSITION[0], self.settings.NEST_POSITION[1]]
 
@@ -55,9 +57,16 @@ class AntWithOrientation(AntBaseClass):
         else:
             return absolute_angle * Decimal("-1")
 
-    def get_next_position(self, pheromones: Pheromones, random_variable_value: Decimal):
-        self.set_detected_pheromones(pheromones=pheromones)
-
+    def get_next_position(
+        self,
+        pheromones: Pheromones,
+        random_variable_value: Decimal,
+        homing_direction: Decimal = None,
+    ):
+        """
+        homing_direction: next direction if the ant returns to the nest,
+        computed in advance for all ants (see ants.homing)
+        """
         if self.looking_for_food:
             direction_change = self.deterministic_move() + self.stochastic_move(
                 random_variable_value
@@ -68,6 +77,12 @@ class AntWithOrientation(AntBaseClass):
             )
             return [next_position_x, next_position_y, next_direction]
 
+        elif homing_direction is not None:
+            [next_position_x, next_position_y] = self.move_with_direction(
+                homing_direction, self.settings.STEP_LENGTH
+            )
+            return [next_position_x, next_position_y, homing_direction]
+
         else:
             distance_from_nest = self.get_distance_from_nest()
             next_direction = self.get_direction_to_nest() + (
@@ -5,9 +5,14 @@ from pheromones import Pheromones
 
 
 class AntWithPheromones(AntBaseClass):
-    def get_next_position(self, pheromones: Pheromones, random_variable_value: Decimal):
-        self.set_detected_pheromones(pheromones=pheromones)
+    __slots__ = ()
 
+    def get_next_position(
+        self,
+        pheromones: Pheromones,
+        random_variable_value: Decimal,
+        homing_direction: Decimal = None,
+    ):
         direction_change = self.deterministic_move() + self.stochastic_move(
             random_variable_value
         )
@@ -4,36 +4,68 @@ import numpy as np
 from ants.ant_with_orientation import AntWithOrientation
 from ants.ant_with_pheromones import AntWithPheromones
 from ants.ant_base_class import AntBaseClass, DetectedPheromones
+from ants.event_log import AntEventLog, AntEventType
+from ants.random_streams import AntRandomStreams
+from ants.homing import get_homing_directions
+from ants.kinematics import create_trig_table, get_antennae_positions
 from environment import FoodSources, Nest
 from pheromones import Pheromones
-from settings import Settings
+from settings import Settings, PheromoneFieldType
 from typing import Dict
 
 
 class DetectedPheromonesStats:
-    def __init__(self) -> None:
-        self.both_antenae = []
-        self.one_antennae = []
-        self.no_antennae = []
+    """
+    Number of ants detecting pheromone with both / one / no antennae in every step.
+    """
+
+    # columns of counts
+    BOTH_ANTENNAE = 0
+    ONE_ANTENNAE = 1
+    NO_ANTENNAE = 2
+
+    def __init__(self, number_of_steps: int = 0) -> None:
+        """
+        number_of_steps: expected number of steps, counts grow if there are more
+        """
+        self.counts = np.zeros((max(number_of_steps, 1), 3), dtype=np.int64)
+        self.number_of_steps = 0
 
     def add_new_step(self):
-        self.both_antenae.append(0)
-        self.one_antennae.append(0)
-        self.no_antennae.append(0)
+        if self.number_of_steps == len(self.counts):
+            self.counts = np.concatenate((self.counts, np.zeros_like(self.counts)))
+        self.number_of_steps += 1
 
     def add_detected_pheromone(self, left_antennae: Decimal, right_antennae: Decimal):
         if left_antennae > 0 and right_antennae > 0:
-            self.both_antenae[-1] += 1
+            self.counts[self.number_of_steps - 1, self.BOTH_ANTENNAE] += 1
         elif left_antennae > 0 or right_antennae > 0:
-            self.one_antennae[-1] += 1
+            self.counts[self.number_of_steps - 1, self.ONE_ANTENNAE] += 1
         else:
-            self.no_antennae[-1] += 1
+            self.counts[self.number_of_steps - 1, self.NO_ANTENNAE] += 1
+
+    def add_detected_pheromones(
+        self, left_antennae: np.ndarray, right_antennae: np.ndarray
+    ):
+        """
+        left_antennae, right_antennae: detected values or Booleans (value > 0)
+        """
+        is_left_detected = np.asarray(left_antennae) > 0
+        is_right_detected = np.asarray(right_antennae) > 0
+        both_antennae = np.count_nonzero(is_left_detected & is_right_detected)
+        one_antennae = np.count_nonzero(is_left_detected ^ is_right_detected)
+        self.counts[self.number_of_steps - 1] += [
+            both_antennae,
+            one_antennae,
+            len(is_left_detected) - both_antennae - one_antennae,
+        ]
 
     def get_results(self):
+        counts = self.counts[: self.number_of_steps]
         return {
-            "both_antenae": self.both_antenae,
-            "one_antennae": self.one_antennae,
-            "no_antennae": self.no_antennae,
+            "both_antenae": counts[:, self.BOTH_ANTENNAE].tolist(),
+            "one_antennae": counts[:, self.ONE_ANTENNAE].tolist(),
+            "no_antennae": counts[:, self.NO_ANTENNAE].tolist(),
         }
 
 
@@ -45,18 +77,32 @@ class _Ants:
     """
 
     def __init__(
-        self, settings: Settings, random_variable_values: list, ants: list = None
+        self,
+        settings: Settings,
+        random_variable_values: list,
+        ants: list = None,
+        random_streams: AntRandomStreams = None,
+        number_of_steps: int = 0,
     ):
+        """
+        random_streams: if set, random values are taken from the streams
+        instead of random_variable_values
+        number_of_steps: expected number of steps (preallocation of stats and histories)
+        """
         self.settings = settings
+        self.number_of_steps = number_of_steps
         self.amount = settings.ANTS_NUMBER
         self.ants: Dict[str, AntBaseClass] = {}
         self.random_variable_values = random_variable_values or []
+        self.random_streams = random_streams
         self.available_ants = self.settings.AVAILABLE_ANTS
         self.current_step = 0
         self.detected_pheromones = {
-            "real_value": DetectedPheromonesStats(),
-            "normalized_value": DetectedPheromonesStats(),
+            "real_value": DetectedPheromonesStats(number_of_steps),
+            "normalized_value": DetectedPheromonesStats(number_of_steps),
         }
+        self.event_log = AntEventLog()
+        self.trig_table = create_trig_table(settings.TRIG_TABLE_SIZE)
 
         if ants is None:
             self.create_initial_ants(settings)
@@ -74,6 +120,7 @@ class _Ants:
         created_at_step: int = 0,
         looking_for_food=None,
         pheromone_deposit_limit=None,
+        number_of_steps: int = 0,
     ):
         raise NotImplementedError
 
@@ -103,6 +150,7 @@ class _Ants:
                 angle,
                 is_recruiter=recruiters_arr[i],
                 created_at_step=0,
+                number_of_steps=self.number_of_steps,
             )
             angle += Decimal(2 * math.pi / self.amount)
 
@@ -117,6 +165,7 @@ class _Ants:
                 ant_data.get("direction"),
                 is_recruiter=ant_data.get("is_recruiter"),
                 created_at_step=0,
+                number_of_steps=self.number_of_steps,
             )
 
     def get_current_ants_data(self):
@@ -131,6 +180,9 @@ class _Ants:
             results[ant.name] = ant.get_ant_final_results()
         return results
 
+    def get_ant_events_data(self):
+        return self.event_log.get_events_data()
+
     def get_ants_stats(self):
         return {
             "pheromones": {
@@ -141,6 +193,25 @@ class _Ants:
             }
         }
 
+    def get_random_variable_values(self, step: int):
+        """
+        Random values of all ants in the step, dict: ant name -> value.
+        Values from random_variable_values are popped in the order of ants.
+        """
+        if self.random_streams is None:
+            return {
+                ant.name: self.get_random_variable_value() for ant in self.ants.values()
+            }
+        values = self.random_streams.get_values(step, self.amount)
+        return {ant.name: values[int(ant.name)] for ant in self.ants.values()}
+
+    def get_homing_directions(self, random_variable_values: dict):
+        """
+        Next directions of ants returning to the nest computed at once,
+        dict: ant name -> direction, missing ants compute the direction themselves.
+        """
+        return {}
+
     def get_random_variable_value(self):
         try:
             return self.random_variable_values.pop()
@@ -150,20 +221,78 @@ class _Ants:
             ).tolist()
             return self.random_variable_values.pop()
 
-    def spread_pheromones(self, pheromones):
+    def spread_pheromones(self, pheromones: Pheromones):
+        positions = []
+        directions = []
+        amounts = []
+        looking_for_food = []
         for ant in self.ants.values():
-            ant.spread_pheromones(pheromones, self.settings.PHEROMONE_RELEASE_TYPE)
-
-    def save_detected_pheromones(self, ant: AntBaseClass):
-        self.detected_pheromones["real_value"].add_detected_pheromone(
-            ant.current_detected_pheromones.left_antennae,
-            ant.current_detected_pheromones.right_antennae,
+            deposit = ant.get_pheromone_deposit()
+            if deposit is None:
+                continue
+            [position, direction, amount] = deposit
+            positions.append(position)
+            directions.append(direction)
+            amounts.append(amount)
+            looking_for_food.append(ant.looking_for_food)
+
+        pheromones.deposit_batch(positions, directions, amounts, looking_for_food)
+
+    def save_detected_pheromones(self):
+        """
+        Classification of detected values of all ants at once.
+        """
+        detected_pheromones = [
+            ant.current_detected_pheromones for ant in self.ants.values()
+        ]
+        # comparisons stay in Decimal, values may be below float range
+        self.detected_pheromones["real_value"].add_detected_pheromones(
+            [detected.left_antennae > 0 for detected in detected_pheromones],
+            [detected.right_antennae > 0 for detected in detected_pheromones],
         )
-        self.detected_pheromones["normalized_value"].add_detected_pheromone(
-            ant.current_detected_pheromones.left_antennae_normalized,
-            ant.current_detected_pheromones.right_antennae_normalized,
+        self.detected_pheromones["normalized_value"].add_detected_pheromones(
+            [detected.left_antennae_normalized > 0 for detected in detected_pheromones],
+            [
+                detected.right_antennae_normalized > 0
+                for detected in detected_pheromones
+            ],
         )
 
+    def get_detected_pheromone_values(self, pheromones: Pheromones):
+        """
+        Watched pheromone values for antennae of all moving ants, sampled at once.
+        Returns dict: ant name -> [left antennae value, right antennae value]
+        """
+        moving_ants = [
+            ant for ant in self.ants.values() if ant.examine_food_in_steps == 0
+        ]
+        looking_for_food = []
+        for ant in moving_ants:
+            looking_for_food += [ant.looking_for_food, ant.looking_for_food]
+
+        if self.settings.PHEROMONE_FIELD_TYPE == PheromoneFieldType.DECIMAL:
+            # Decimal reference mode keeps the exact computation of every ant
+            positions = []
+            for ant in moving_ants:
+                positions.append(ant.get_left_antennae_position())
+                positions.append(ant.get_right_antennae_position())
+        else:
+            positions = get_antennae_positions(
+                np.array([float(ant.current_position_x) for ant in moving_ants]),
+                np.array([float(ant.current_position_y) for ant in moving_ants]),
+                np.array([float(ant.current_direction) for ant in moving_ants]),
+                float(self.settings.ANTENNAE_LENGTH),
+                float(self.settings.LEFT_ANTENNAE_ANGLE),
+                float(self.settings.RIGHT_ANTENNAE_ANGLE),
+                self.trig_table,
+            )
+
+        values = pheromones.get_watched_pheromone_values(positions, looking_for_food)
+        return {
+            ant.name: values[2 * index : 2 * index + 2]
+            for index, ant in enumerate(moving_ants)
+        }
+
     def move_all(
         self, step: int, pheromones: Pheromones, foods: FoodSources, nest: Nest
     ):
@@ -172,10 +301,27 @@ class _Ants:
         self.detected_pheromones["real_value"].add_new_step()
         self.detected_pheromones["normalized_value"].add_new_step()
 
+        detected_pheromone_values = self.get_detected_pheromone_values(pheromones)
+        random_variable_values = self.get_random_variable_values(step)
+        homing_directions = self.get_homing_directions(random_variable_values)
         for ant in self.ants.values():
-            ant.move(step, pheromones, foods, nest, self.get_random_variable_value())
-            self.save_detected_pheromones(ant)
+            [found_food, found_nest] = ant.move(
+                step,
+                pheromones,
+                foods,
+                nest,
+                random_variable_values[ant.name],
+                detected_pheromone_values=detected_pheromone_values.get(ant.name),
+                homing_direction=homing_directions.get(ant.name),
+            )
+            if found_food is not None:
+                self.event_log.add_event(
+                    step, int(ant.name), AntEventType.FOUND_FOOD, found_food.id
+                )
+            if found_nest:
+                self.event_log.add_event(step, int(ant.name), AntEventType.FOUND_NEST)
             results[ant.name] = ant.get_current_ant_data()
+        self.save_detected_pheromones()
 
         recruitment_result = self.recruit_new_ants()
         results.update(recruitment_result)
@@ -194,6 +340,7 @@ class _Ants:
             is_recruiter=False,
             looking_for_food=True,
             created_at_step=self.current_step,
+            number_of_steps=max(self.number_of_steps - self.current_step, 0),
         )
         return new_ant
 
@@ -231,6 +378,30 @@ class AntsWithOrientation(_Ants):
     def create_ant(self, *args, **kwargs):
         return AntWithOrientation(*args, **kwargs)
 
+    def get_homing_directions(self, random_variable_values: dict):
+        # Decimal reference mode keeps the exact computation of every ant
+        if self.settings.PHEROMONE_FIELD_TYPE == PheromoneFieldType.DECIMAL:
+            return {}
+
+        homing_ants = [
+            ant
+            for ant in self.ants.values()
+            if ant.examine_food_in_steps == 0 and not ant.looking_for_food
+        ]
+        if len(homing_ants) == 0:
+            return {}
+        directions = get_homing_directions(
+            np.array([float(ant.current_position_x) for ant in homing_ants]),
+            np.array([float(ant.current_position_y) for ant in homing_ants]),
+            self.settings.NEST_POSITION,
+            float(self.settings.ORIENTATION_RANDOMNESS),
+            np.array([random_variable_values[ant.name] for ant in homing_ants]),
+        )
+        return {
+            ant.name: Decimal(direction)
+            for ant, direction in zip(homing_ants, directions.tolist())
+        }
+
 
 class AntsWithPheromones(_Ants):
     def create_ant(self, *args, **kwargs):
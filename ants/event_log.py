@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class AntEventType:
+    FOUND_FOOD = 0
+    FOUND_NEST = 1
+
+
+ANT_EVENT_DTYPE = np.dtype(
+    [
+        ("step", np.int32),
+        ("ant", np.int32),
+        ("event_type", np.int8),
+        # id of found food, -1 for other events
+        ("food_id", np.int32),
+    ]
+)
+
+
+class AntEventLog:
+    """
+    Sparse log of ant events (found food, found nest),
+    one record per event instead of one value per step and ant.
+    """
+
+    def __init__(self, initial_capacity: int = 64):
+        self.events = np.zeros(initial_capacity, dtype=ANT_EVENT_DTYPE)
+        self.number_of_events = 0
+
+    def _reserve(self, number_of_new_events: int):
+        required_capacity = self.number_of_events + number_of_new_events
+        if required_capacity <= len(self.events):
+            return
+        events = np.zeros(
+            max(required_capacity, 2 * len(self.events)), dtype=ANT_EVENT_DTYPE
+        )
+        events[: self.number_of_events] = self.events[: self.number_of_events]
+        self.events = events
+
+    def add_event(self, step: int, ant: int, event_type: int, food_id: int = -1):
+        self._reserve(1)
+        self.events[self.number_of_events] = (step, ant, event_type, food_id)
+        self.number_of_events += 1
+
+    def add_events(
+        self, step: int, ants: np.ndarray, event_type: int, food_ids: np.ndarray = None
+    ):
+        number = len(ants)
+        if number == 0:
+            return
+        self._reserve(number)
+        events = self.events[self.number_of_events : self.number_of_events + number]
+        events["step"] = step
+        events["ant"] = ants
+        events["event_type"] = event_type
+        events["food_id"] = -1 if food_ids is None else food_ids
+        self.number_of_events += number
+
+    def get_events(self):
+        return self.events[: self.number_of_events]
+
+    def get_events_data(self):
+        """
+        Events as dict of lists (JSON serializable), see expand_ant_events.
+        """
+        events = self.get_events()
+        return {name: events[name].tolist() for name in ANT_EVENT_DTYPE.names}
+
+    def get_steps_view(self, ant: int, number_of_steps: int):
+        return expand_ant_events(self.get_events_data(), ant, number_of_steps)
+
+
+def expand_ant_events(events_data: dict, ant: int, number_of_steps: int):
+    """
+    Dense per step view of one ant from events data (AntEventLog.get_events_data,
+    "ant_events" in results).
+    Returns [found_food_in_steps, found_nest_in_steps], lists with an entry for every
+    step from 0 to number_of_steps: None or food id, Boolean.
+    """
+    found_food_in_steps = [None] * (number_of_steps + 1)
+    found_nest_in_steps = [False] * (number_of_steps + 1)
+    for step, event_ant, event_type, food_id in zip(
+        events_data["step"],
+        events_data["ant"],
+        events_data["event_type"],
+        events_data["food_id"],
+    ):
+        if event_ant != int(ant):
+            continue
+        if event_type == AntEventType.FOUND_FOOD:
+            found_food_in_steps[step] = food_id
+        elif event_type == AntEventType.FOUND_NEST:
+            found_nest_in_steps[step] = True
+    return [found_food_in_steps, found_nest_in_steps]
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def get_homing_directions(
+    position_x: np.ndarray,
+    position_y: np.ndarray,
+    nest_position: list,
+    orientation_randomness: float,
+    random_variable_values: np.ndarray,
+):
+    """
+    Next directions of ants returning to the nest (AntWithOrientation), float arrays.
+    Direction to the nest center plus random change, which is smaller near the nest:
+    min(1, ORIENTATION_RANDOMNESS * distance from nest) * random variable value
+    """
+    diff_x = float(nest_position[0]) - position_x
+    diff_y = float(nest_position[1]) - position_y
+    return np.arctan2(diff_y, diff_x) + (
+        np.minimum(1.0, orientation_randomness * np.hypot(diff_x, diff_y))
+        * random_variable_values
+    )
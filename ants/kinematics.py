@@ -0,0 +1,102 @@
+import math
+import numpy as np
+
+
+class TrigTable:
+    """
+    Quantized sin/cos: values are taken from a table of `size` angles in [0, 2 * pi),
+    angle is rounded to the nearest table angle (error at most pi / size).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.step = 2 * math.pi / size
+        angles = np.arange(size) * self.step
+        self.cos_values = np.cos(angles)
+        self.sin_values = np.sin(angles)
+
+    def get_indices(self, angles: np.ndarray):
+        return np.rint(np.asarray(angles) / self.step).astype(np.int64) % self.size
+
+    def cos(self, angles: np.ndarray):
+        return self.cos_values[self.get_indices(angles)]
+
+    def sin(self, angles: np.ndarray):
+        return self.sin_values[self.get_indices(angles)]
+
+    def cos_sin(self, angles: np.ndarray):
+        indices = self.get_indices(angles)
+        return self.cos_values[indices], self.sin_values[indices]
+
+
+def create_trig_table(size: int = None):
+    """
+    Returns None (exact np.cos / np.sin) if size is None.
+    """
+    if size is None:
+        return None
+    return TrigTable(size)
+
+
+def get_cos_sin(angles: np.ndarray, trig_table: TrigTable = None):
+    if trig_table is None:
+        return np.cos(angles), np.sin(angles)
+    return trig_table.cos_sin(angles)
+
+
+def normalize_ant_directions(directions: np.ndarray):
+    """
+    Vectorized AntBaseClass.normalize_ant_direction,
+    positive multiples of 2 * pi stay 2 * pi as in the original loop.
+    """
+    result = np.mod(directions, 2 * math.pi)
+    result[(result == 0) & (directions > 0)] = 2 * math.pi
+    return result
+
+
+def turn_around_directions(directions: np.ndarray):
+    return normalize_ant_directions(
+        np.where(directions > math.pi, directions - math.pi, directions + math.pi)
+    )
+
+
+def get_antennae_positions(
+    position_x: np.ndarray,
+    position_y: np.ndarray,
+    directions: np.ndarray,
+    antennae_length: float,
+    left_antennae_angle: float,
+    right_antennae_angle: float,
+    trig_table: TrigTable = None,
+):
+    """
+    Positions of antennae of all ants, array (2 * number of ants, 2):
+    left and right antennae of the first ant, then of the second ant, ...
+    """
+    [left_cos, left_sin] = get_cos_sin(directions + left_antennae_angle, trig_table)
+    [right_cos, right_sin] = get_cos_sin(directions - right_antennae_angle, trig_table)
+    positions = np.empty((2 * len(directions), 2))
+    positions[0::2, 0] = position_x + antennae_length * left_cos
+    positions[0::2, 1] = position_y + antennae_length * left_sin
+    positions[1::2, 0] = position_x + antennae_length * right_cos
+    positions[1::2, 1] = position_y + antennae_length * right_sin
+    return positions
+
+
+def get_next_positions(
+    position_x: np.ndarray,
+    position_y: np.ndarray,
+    directions: np.ndarray,
+    step_length: float,
+    trig_table: TrigTable = None,
+):
+    """
+    Positions after one step in directions (AntBaseClass.move_with_direction).
+    """
+    [cos_values, sin_values] = get_cos_sin(
+        normalize_ant_directions(directions), trig_table
+    )
+    return [
+        position_x + cos_values * step_length,
+        position_y + sin_values * step_length,
+    ]
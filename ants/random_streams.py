@@ -0,0 +1,23 @@
+import numpy as np
+
+
+class AntRandomStreams:
+    """
+    Counter-based random variable values (Philox), replaces the list of values.
+    Value of an ant in a step depends only on the seed, the step and the ant name,
+    so it does not depend on order of ants, recruitment or number of ants.
+    """
+
+    def __init__(self, seed: int):
+        self.seed = int(seed)
+
+    def get_values(self, step: int, number_of_ants: int):
+        """
+        Values of ants with names 0, ..., number_of_ants - 1 in the step.
+        """
+        # the step is in the highest word of the counter,
+        # so streams of different steps never overlap
+        generator = np.random.Generator(
+            np.random.Philox(key=self.seed, counter=[0, 0, 0, step])
+        )
+        return generator.standard_normal(number_of_ants)
@@ -0,0 +1,151 @@
+import numpy as np
+
+from settings import Settings, TrajectoryHistoryType
+
+
+class RingBufferTrajectoryHistory:
+    """
+    Keeps only the last `length` positions of the ant.
+    """
+
+    __slots__ = ("positions", "number_of_positions")
+
+    def __init__(self, length: int):
+        self.positions = np.empty((length, 2))
+        self.number_of_positions = 0
+
+    def append(self, x, y):
+        self.positions[self.number_of_positions % len(self.positions)] = [x, y]
+        self.number_of_positions += 1
+
+    def get_positions(self):
+        """
+        Stored positions from the oldest one, array (number of positions, 2).
+        """
+        length = len(self.positions)
+        if self.number_of_positions <= length:
+            return self.positions[: self.number_of_positions].copy()
+        start = self.number_of_positions % length
+        return np.concatenate((self.positions[start:], self.positions[:start]))
+
+
+class PreallocatedTrajectoryHistory:
+    """
+    Keeps all positions of the ant in an array preallocated for `length` positions,
+    the array is doubled if the ant makes more steps than expected.
+    """
+
+    __slots__ = ("positions", "number_of_positions")
+
+    def __init__(self, length: int):
+        self.positions = np.empty((max(length, 1), 2))
+        self.number_of_positions = 0
+
+    def append(self, x, y):
+        if self.number_of_positions == len(self.positions):
+            self.positions = np.concatenate(
+                (self.positions, np.empty_like(self.positions))
+            )
+        self.positions[self.number_of_positions] = [x, y]
+        self.number_of_positions += 1
+
+    def get_positions(self):
+        return self.positions[: self.number_of_positions].copy()
+
+
+class ColonyTrajectoryHistory:
+    """
+    Positions of all ants of the colony (ARRAYS engine), array (ants, length, 2).
+    If `is_ring_buffer`, only the last `length` positions of every ant are kept,
+    otherwise the array is doubled when an ant makes more steps than expected.
+    """
+
+    def __init__(self, number_of_ants: int, length: int, is_ring_buffer: bool):
+        self.positions = np.empty((number_of_ants, max(length, 1), 2))
+        self.number_of_positions = np.zeros(number_of_ants, dtype=np.int64)
+        self.is_ring_buffer = is_ring_buffer
+
+    def append(self, ants: np.ndarray, x: np.ndarray, y: np.ndarray):
+        """
+        ants: indexes of ants, x, y: their current positions
+        """
+        if ants.size == 0:
+            return
+        length = self.positions.shape[1]
+        indexes = self.number_of_positions[ants]
+        if self.is_ring_buffer:
+            indexes = indexes % length
+        elif indexes.max() >= length:
+            self.positions = np.concatenate(
+                (self.positions, np.empty_like(self.positions)), axis=1
+            )
+        self.positions[ants, indexes, 0] = x
+        self.positions[ants, indexes, 1] = y
+        self.number_of_positions[ants] += 1
+
+    def get_positions(self, ant: int):
+        """
+        Stored positions of the ant from the oldest one, array (number of positions, 2).
+        """
+        length = self.positions.shape[1]
+        number_of_positions = self.number_of_positions[ant]
+        if number_of_positions <= length:
+            return self.positions[ant, :number_of_positions].copy()
+        start = number_of_positions % length
+        return np.concatenate(
+            (self.positions[ant, start:], self.positions[ant, :start])
+        )
+
+
+def get_trajectory_history_length(settings: Settings, number_of_steps: int = 0):
+    """
+    PREALLOCATED history holds all positions of a run of number_of_steps steps
+    (the initial position and one position per step).
+    """
+    if (
+        settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.PREALLOCATED
+        and number_of_steps > 0
+    ):
+        return number_of_steps + 1
+    return settings.TRAJECTORY_HISTORY_LENGTH
+
+
+def create_trajectory_history(settings: Settings, number_of_steps: int = 0):
+    """
+    Returns None if trajectory history is disabled.
+    number_of_steps: expected number of steps of the ant (preallocation)
+    """
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.DISABLED:
+        return None
+    length = get_trajectory_history_length(settings, number_of_steps)
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.RING_BUFFER:
+        return RingBufferTrajectoryHistory(length)
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.PREALLOCATED:
+        return PreallocatedTrajectoryHistory(length)
+    raise NotImplementedError(
+        'Unknown trajectory history type "'
+        + str(settings.TRAJECTORY_HISTORY_TYPE)
+        + '".'
+    )
+
+
+def create_colony_trajectory_history(
+    settings: Settings, number_of_ants: int, number_of_steps: int = 0
+):
+    """
+    Returns None if trajectory history is disabled.
+    number_of_ants: capacity of the colony
+    number_of_steps: expected number of steps (preallocation)
+    """
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.DISABLED:
+        return None
+    length = get_trajectory_history_length(settings, number_of_steps)
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.RING_BUFFER:
+        return ColonyTrajectoryHistory(number_of_ants, length, is_ring_buffer=True)
+    if settings.TRAJECTORY_HISTORY_TYPE == TrajectoryHistoryType.PREALLOCATED:
+        return ColonyTrajectoryHistory(number_of_ants, length, is_ring_buffer=False)
+    raise NotImplementedError(
+        'Unknown trajectory history type "'
+        + str(settings.TRAJECTORY_HISTORY_TYPE)
+        + '".'
+    )
@@ -0,0 +1,116 @@
+"""
+Per-ant Decimal kinematics (AntBaseClass) against ants.kinematics.
+Run from the repository root: python -m benchmarks.ant_kinematics
+"""
+
+import argparse
+import math
+import timeit
+from decimal import Decimal
+import numpy as np
+
+from ants.ant_with_pheromones import AntWithPheromones
+from ants.kinematics import (
+    TrigTable,
+    get_antennae_positions,
+    get_next_positions,
+)
+from settings import Settings
+
+
+def run_per_ant(ants: list, settings: Settings):
+    for ant in ants:
+        ant.get_left_antennae_position()
+        ant.get_right_antennae_position()
+        ant.move_with_direction(ant.current_direction, settings.STEP_LENGTH)
+
+
+def run_arrays(x, y, directions, settings: Settings, trig_table: TrigTable = None):
+    antennae_positions = get_antennae_positions(
+        x,
+        y,
+        directions,
+        float(settings.ANTENNAE_LENGTH),
+        float(settings.LEFT_ANTENNAE_ANGLE),
+        float(settings.RIGHT_ANTENNAE_ANGLE),
+        trig_table,
+    )
+    next_positions = get_next_positions(
+        x, y, directions, float(settings.STEP_LENGTH), trig_table
+    )
+    return antennae_positions, next_positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ants", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--table-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    settings = Settings()
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, settings.ENVIRONMENT_SIZE, args.ants)
+    y = rng.uniform(0, settings.ENVIRONMENT_SIZE, args.ants)
+    # directions of ants are not normalized
+    directions = rng.uniform(-4 * math.pi, 20 * math.pi, args.ants)
+    ants = [
+        AntWithPheromones(
+            settings,
+            index,
+            Decimal(x[index]),
+            Decimal(y[index]),
+            Decimal(directions[index]),
+        )
+        for index in range(args.ants)
+    ]
+    trig_table = TrigTable(args.table_size)
+
+    results = {
+        "per ant (Decimal)": timeit.timeit(
+            lambda: run_per_ant(ants, settings), number=args.repeat
+        ),
+        "arrays": timeit.timeit(
+            lambda: run_arrays(x, y, directions, settings), number=args.repeat
+        ),
+        "arrays, table "
+        + str(args.table_size): timeit.timeit(
+            lambda: run_arrays(x, y, directions, settings, trig_table),
+            number=args.repeat,
+        ),
+    }
+    print("ants:", args.ants, "repeat:", args.repeat)
+    for name, duration in results.items():
+        print(f"{name:>28}: {1000 * duration / args.repeat:10.3f} ms per step")
+
+    [exact_antennae, exact_next] = run_arrays(x, y, directions, settings)
+    [table_antennae, table_next] = run_arrays(x, y, directions, settings, trig_table)
+    print(
+        "max position error of the table:",
+        max(
+            np.max(np.abs(exact_antennae - table_antennae)),
+            np.max(np.abs(np.array(exact_next) - np.array(table_next))),
+        ),
+        "mm",
+    )
+
+    per_ant_next = np.array(
+        [
+            [
+                float(value)
+                for value in ant.move_with_direction(
+                    ant.current_direction, settings.STEP_LENGTH
+                )
+            ]
+            for ant in ants
+        ]
+    )
+    print(
+        "max difference of arrays from per ant code:",
+        np.max(np.abs(per_ant_next - np.array(exact_next).T)),
+        "mm",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Divergence of FLOAT64 and FLOAT32 pheromone fields from the Decimal reference.
+One scenario (same random seed) is run with every field type, for every step
+errors of pheromone fields and distances of ants from their reference positions
+are reported.
+Run from the repository root: python -m benchmarks.field_precision
+"""
+
+import argparse
+import shutil
+import tempfile
+import numpy as np
+
+from helper_functions import try_make_dir
+from settings import PheromoneFieldType
+from simulation import Simulation, AntOrientationType
+
+REFERENCE_FIELD_TYPE = PheromoneFieldType.DECIMAL
+FIELD_TYPES = [PheromoneFieldType.FLOAT64, PheromoneFieldType.FLOAT32]
+
+
+def get_fields(simulation: Simulation):
+    return [
+        np.array(pheromone.current_field, dtype=np.float64)
+        for pheromone in simulation.pheromones.get_pheromones()
+    ]
+
+
+def get_positions(simulation: Simulation):
+    return {
+        name: [float(ant_data["x"]), float(ant_data["y"])]
+        for name, ant_data in simulation.ants.get_current_ants_data().items()
+    }
+
+
+def get_field_error(fields: list, reference_fields: list):
+    """Maximum absolute error of fields relative to maximum reference value."""
+    errors = []
+    for field, reference_field in zip(fields, reference_fields):
+        maximum = np.max(np.abs(reference_field))
+        error = np.max(np.abs(field - reference_field))
+        errors.append(error / maximum if maximum > 0 else error)
+    return max(errors)
+
+
+def get_trajectory_divergence(positions: dict, reference_positions: dict):
+    """Maximum and mean distance of ants (in mm) from their reference positions."""
+    names = [name for name in reference_positions if name in positions]
+    if len(names) == 0:
+        return 0.0, 0.0
+    distances = np.hypot(
+        *(
+            np.array([positions[name] for name in names])
+            - np.array([reference_positions[name] for name in names])
+        ).T
+    )
+    return float(np.max(distances)), float(np.mean(distances))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--ants", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--orientation",
+        default=AntOrientationType.TWO_PHEROMONES,
+        choices=[
+            AntOrientationType.TWO_PHEROMONES,
+            AntOrientationType.ONE_PHEROMONE,
+            AntOrientationType.ONE_PHEROMONE_WITH_ORIENTATION,
+        ],
+    )
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="field_precision_")
+    try_make_dir(folder + "/results")
+    try:
+        simulations = {
+            field_type: Simulation(
+                number_of_steps=args.steps,
+                settings={"PHEROMONE_FIELD_TYPE": field_type, "ANTS_NUMBER": args.ants},
+                random_seed=args.seed,
+                results_folder=folder,
+                simulation_folder_name=field_type,
+                ant_orientation_type=args.orientation,
+            )
+            for field_type in [REFERENCE_FIELD_TYPE] + FIELD_TYPES
+        }
+
+        for field_type in FIELD_TYPES:
+            field = simulations[field_type].pheromones.get_pheromones()[0]
+            print(
+                f"{field_type}: {field.current_field.nbytes / 2**20:.2f} MiB per field"
+            )
+        print(
+            f"{'step':>5}",
+            *[
+                f"{field_type + ' ' + name:>24}"
+                for field_type in FIELD_TYPES
+                for name in ["field error", "max distance", "mean distance"]
+            ],
+        )
+        for step in range(1, args.steps + 1):
+            for simulation in simulations.values():
+                simulation.current_step = step
+                simulation.run_step()
+
+            reference = simulations[REFERENCE_FIELD_TYPE]
+            reference_fields = get_fields(reference)
+            reference_positions = get_positions(reference)
+            values = []
+            for field_type in FIELD_TYPES:
+                simulation = simulations[field_type]
+                values.append(get_field_error(get_fields(simulation), reference_fields))
+                values.extend(
+                    get_trajectory_divergence(
+                        get_positions(simulation), reference_positions
+                    )
+                )
+            print(f"{step:>5}", *[f"{value:>24.3e}" for value in values])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
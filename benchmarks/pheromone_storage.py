@@ -0,0 +1,98 @@
+"""
+Throughput of pheromone fields in RAM (SEPARATE) against memory mapped fields.
+Every step releases pheromone of ants, reads values for their antennae and diffuses.
+Run from the repository root: python -m benchmarks.pheromone_storage
+"""
+
+import argparse
+import math
+import shutil
+import tempfile
+import timeit
+import numpy as np
+
+from pheromones import Pheromones
+from settings import Settings, PheromoneStorageType
+
+
+def run_steps(pheromones: Pheromones, positions, directions, number_of_steps: int):
+    looking_for_food = np.arange(len(directions)) % 2 == 0
+    amounts = np.full(len(directions), 0.001)
+    for _ in range(number_of_steps):
+        pheromones.deposit_batch(positions, directions, amounts, looking_for_food)
+        pheromones.get_watched_pheromone_values(positions, looking_for_food)
+        pheromones.diffuse_step()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--environment-size", type=int, default=1000)
+    parser.add_argument("--ants", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument(
+        "--folder", default=None, help="folder of memory mapped files (temporary)"
+    )
+    args = parser.parse_args()
+
+    folder = args.folder or tempfile.mkdtemp(prefix="pheromone_fields_")
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, args.environment_size, (args.ants, 2))
+    directions = rng.uniform(0, 2 * math.pi, args.ants)
+
+    results = {}
+    fields = {}
+    try:
+        for storage_type in [
+            PheromoneStorageType.SEPARATE,
+            PheromoneStorageType.MEMORY_MAPPED,
+        ]:
+            settings = Settings(
+                {
+                    "ENVIRONMENT_SIZE": args.environment_size,
+                    "PHEROMONE_STORAGE_TYPE": storage_type,
+                }
+            )
+            pheromones = Pheromones(settings, fields_folder=folder)
+            results[storage_type] = timeit.timeit(
+                lambda: run_steps(pheromones, positions, directions, args.steps),
+                number=1,
+            )
+            fields[storage_type] = np.array(pheromones.pheromone_a.current_field)
+            del pheromones
+    finally:
+        if args.folder is None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    size = settings.NUMERICAL_ARRAY_SIZE
+    print(
+        "grid:",
+        f"{size} x {size},",
+        "field:",
+        f"{size * size * 8 / 2**20:.1f} MiB,",
+        "ants:",
+        args.ants,
+        "steps:",
+        args.steps,
+    )
+    for storage_type, duration in results.items():
+        print(
+            f"{storage_type:>14}: {1000 * duration / args.steps:10.3f} ms per step,"
+            f" {args.steps / duration:8.2f} steps/s"
+        )
+    print(
+        "memory mapped / in RAM:",
+        f"{results[PheromoneStorageType.MEMORY_MAPPED] / results[PheromoneStorageType.SEPARATE]:.2f}",
+    )
+    print(
+        "max difference of fields:",
+        np.max(
+            np.abs(
+                fields[PheromoneStorageType.SEPARATE]
+                - fields[PheromoneStorageType.MEMORY_MAPPED]
+            )
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from decimal import *
+import heapq
 import numpy as np
 
+from environment.food_index import FoodSourcesIndex
 from settings import Settings
 
 
@@ -42,12 +44,15 @@ class FoodSource:
     def take_food(self):
         self.amount = self.amount - 1
 
-    def find_food(self, x: Decimal, y: Decimal, step: int):
-        if (
+    def is_available(self, step: int):
+        return not (
             self.created_at > step
             or (self.ends_at is not None and self.ends_at < step)
             or self.amount <= 0
-        ):
+        )
+
+    def find_food(self, x: Decimal, y: Decimal, step: int):
+        if not self.is_available(step):
             return False
 
         is_near = (
@@ -71,15 +76,81 @@ class FoodSources:
                     affect_pheromone_amount=settings.AFFECT_PHEROMONE_AMOUNT,
                 )
             )
+        self.index = FoodSourcesIndex(self.foods)
+
+        # active foods (created, not removed and not depleted), updated by events
+        self.is_active = np.zeros(len(self.foods), dtype=bool)
+        self.active_at_step = None
+        # queue of events: (step, 0 - removal / 1 - appearance, food index)
+        self.events = []
+        for index, food in enumerate(self.foods):
+            if food.amount <= 0 or (
+                food.ends_at is not None and food.ends_at < food.created_at
+            ):
+                continue
+            self.events.append((food.created_at, 1, index))
+            if food.ends_at is not None:
+                self.events.append((food.ends_at + 1, 0, index))
+        heapq.heapify(self.events)
+        self.update_active_foods(0)
+
+    def update_active_foods(self, step: int):
+        """
+        Processes events up to the step, steps must not decrease.
+        """
+        if self.active_at_step is not None and self.active_at_step >= step:
+            return
+        self.active_at_step = step
+        while len(self.events) > 0 and self.events[0][0] <= step:
+            [_, is_appearance, index] = heapq.heappop(self.events)
+            self.is_active[index] = bool(is_appearance) and self.foods[index].amount > 0
+
+    def take_food(self, index: int):
+        food = self.foods[index]
+        food.take_food()
+        if food.amount <= 0:
+            self.is_active[index] = False
+
+    def get_active_foods(self):
+        return [self.foods[index] for index in np.flatnonzero(self.is_active)]
 
     def find_food(self, x: Decimal, y: Decimal, step: int):
-        for food in self.foods:
+        self.update_active_foods(step)
+        # only active foods from the cell of the position can contain it
+        _, food_indices = self.index.get_candidates(
+            [float(x)], [float(y)], self.is_active
+        )
+        for food_index in food_indices:
+            food = self.foods[food_index]
             if food.find_food(x, y, step):
+                if food.amount <= 0:
+                    self.is_active[food_index] = False
                 return food
         return None
 
-    def get_food_data(self):
+    def find_food_batch(self, x: np.ndarray, y: np.ndarray, step: int):
+        """
+        find_food for many positions at once.
+        Positions are processed in order, so food taken for one position
+        may not be available for the next ones.
+        Returns ids of found foods, -1 if no food was found.
+        """
+        self.update_active_foods(step)
+        found_food_ids = np.full(len(x), -1)
+        position_indices, food_indices = self.index.get_containing_foods(
+            x, y, self.is_active
+        )
+
+        # the first active food (in the order of foods) is taken
+        for position_index, food_index in zip(position_indices, food_indices):
+            if found_food_ids[position_index] >= 0 or not self.is_active[food_index]:
+                continue
+            self.take_food(food_index)
+            found_food_ids[position_index] = self.foods[food_index].id
+        return found_food_ids
+
+    def get_food_data(self, only_active: bool = False):
         result = []
-        for food in self.foods:
+        for food in self.get_active_foods() if only_active else self.foods:
             result.append(food.get_food_params())
         return result
@@ -0,0 +1,119 @@
+import numpy as np
+
+# disks are registered slightly larger, so rounding of positions (Decimal -> float)
+# can not move a position inside a disk out of the registered cells
+REGISTRATION_MARGIN = 1e-9
+# cells are enlarged if small foods are far apart, so the grid has at most
+# MAX_CELLS_PER_AXIS ** 2 cells
+MAX_CELLS_PER_AXIS = 256
+
+
+class FoodSourcesIndex:
+    """
+    Uniform grid over food sources.
+    Every cell contains indices (to the list of foods) of foods whose disk overlaps
+    the cell, in the order of the list.
+    """
+
+    def __init__(self, foods: list):
+        self.number_of_foods = len(foods)
+        self.foods_x = np.array([float(food.x) for food in foods])
+        self.foods_y = np.array([float(food.y) for food in foods])
+        self.foods_radius = np.array([float(food.radius) for food in foods])
+
+        if self.number_of_foods == 0:
+            self.cell_size = 1.0
+            self.origin = np.zeros(2)
+            self.shape = np.zeros(2, dtype=int)
+            self.cell_starts = np.zeros(1, dtype=int)
+            self.cell_foods = np.zeros(0, dtype=int)
+            return
+
+        radius = self.foods_radius + REGISTRATION_MARGIN
+        self.origin = np.array(
+            [np.min(self.foods_x - radius), np.min(self.foods_y - radius)]
+        )
+        extent = (
+            np.array([np.max(self.foods_x + radius), np.max(self.foods_y + radius)])
+            - self.origin
+        )
+        self.cell_size = max(
+            2 * float(np.max(radius)),
+            float(np.max(extent)) / MAX_CELLS_PER_AXIS,
+            REGISTRATION_MARGIN,
+        )
+        self.shape = np.floor(extent / self.cell_size).astype(int) + 1
+
+        [start_x, start_y] = self.get_cells(
+            self.foods_x - radius, self.foods_y - radius
+        )
+        [end_x, end_y] = self.get_cells(self.foods_x + radius, self.foods_y + radius)
+        cells = []
+        food_indices = []
+        for food_index in range(self.number_of_foods):
+            for cell_x in range(start_x[food_index], end_x[food_index] + 1):
+                for cell_y in range(start_y[food_index], end_y[food_index] + 1):
+                    cells.append(cell_x * self.shape[1] + cell_y)
+                    food_indices.append(food_index)
+
+        # foods of the cell: cell_foods[cell_starts[cell] : cell_starts[cell + 1]]
+        cells = np.array(cells, dtype=int)
+        order = np.lexsort((food_indices, cells))
+        self.cell_foods = np.array(food_indices, dtype=int)[order]
+        self.cell_starts = np.searchsorted(
+            cells[order], np.arange(self.shape[0] * self.shape[1] + 1)
+        )
+
+    def get_cells(self, x: np.ndarray, y: np.ndarray):
+        return [
+            np.floor((np.asarray(x) - self.origin[0]) / self.cell_size).astype(int),
+            np.floor((np.asarray(y) - self.origin[1]) / self.cell_size).astype(int),
+        ]
+
+    def get_candidates(self, x: np.ndarray, y: np.ndarray, is_active=None):
+        """
+        Pairs of position indices and food indices, the food may contain the position.
+        Pairs are ordered by positions, foods of one position in the order of the list.
+        is_active: Boolean mask of foods, other foods are skipped
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        [cell_x, cell_y] = self.get_cells(x, y)
+        is_inside = (
+            (cell_x >= 0)
+            & (cell_x < self.shape[0])
+            & (cell_y >= 0)
+            & (cell_y < self.shape[1])
+        )
+        positions = np.flatnonzero(is_inside)
+        cells = cell_x[positions] * self.shape[1] + cell_y[positions]
+        starts = self.cell_starts[cells]
+        counts = self.cell_starts[cells + 1] - starts
+
+        position_indices = np.repeat(positions, counts)
+        # index of every candidate in cell_foods
+        offsets = np.arange(len(position_indices)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        food_indices = self.cell_foods[np.repeat(starts, counts) + offsets]
+        if is_active is not None:
+            is_candidate_active = is_active[food_indices]
+            position_indices = position_indices[is_candidate_active]
+            food_indices = food_indices[is_candidate_active]
+        return position_indices, food_indices
+
+    def get_containing_foods(self, x: np.ndarray, y: np.ndarray, is_active=None):
+        """
+        Like get_candidates, but only pairs where the food disk contains the position.
+        """
+        position_indices, food_indices = self.get_candidates(x, y, is_active)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        is_near = (
+            np.hypot(
+                x[position_indices] - self.foods_x[food_indices],
+                y[position_indices] - self.foods_y[food_indices],
+            )
+            < self.foods_radius[food_indices]
+        )
+        return position_indices[is_near], food_indices[is_near]
@@ -1,3 +1,5 @@
+import numpy as np
+
 from helper_functions import get_point_distance
 from settings import Settings
 
@@ -37,3 +39,6 @@ class Nest:
 
     def found_nest(self, ant_position: list):
         return get_point_distance(ant_position, [self.x, self.y]) <= self.radius
+
+    def found_nest_batch(self, x: np.ndarray, y: np.ndarray):
+        return np.hypot(x - float(self.x), y - float(self.y)) <= float(self.radius)
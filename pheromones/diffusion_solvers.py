@@ -0,0 +1,222 @@
+import math
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+from scipy import fft
+from scipy.linalg import solve_banded
+
+from settings import Settings, SpectralBoundaryType
+
+# values below ROUND_OFF_FLOOR times the largest value of the field are round-off
+# errors of transforms or tails of implicit solves spread over the whole field,
+# they are set to zero, so only grid points with pheromone stay non zero
+ROUND_OFF_FLOOR = np.finfo(np.float64).eps
+
+
+def remove_round_off_values(fields: np.ndarray, axes: tuple = (0, 1)):
+    """
+    Sets negative values and round-off errors to zero in place,
+    axes: axes of one field (other axes are channels).
+    """
+    floors = ROUND_OFF_FLOOR * fields.max(axis=axes, keepdims=True)
+    fields[fields < floors] = 0
+
+
+class AdiDiffusionSolver:
+    """
+    Peaceman-Rachford alternating direction implicit (Crank-Nicolson like) scheme
+    for the pheromone field with linear decay.
+    The scheme is unconditionally stable, so one ant step is advanced with one
+    implicit half step in every direction (two sets of tridiagonal solves),
+    regardless of the numerical step size.
+    Values outside of the field are considered to be zero, as in the explicit scheme.
+    Implicit solves spread tiny values over the whole field, values below round-off
+    of the largest value are set to zero after every step.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        diffusion_constant: Decimal,
+        pde_decay: Decimal,
+        time_step: Decimal,
+    ):
+        self.size = settings.NUMERICAL_ARRAY_SIZE
+        self.time_step = time_step
+        # every direction is handled implicitly for one half of the time step
+        self.ratio = float(
+            diffusion_constant
+            * time_step
+            / (Decimal("2") * settings.NUMERICAL_STEP_SIZE ** Decimal("2"))
+        )
+        # decay is split between both half steps, implicit and explicit parts
+        self.decay = float(pde_decay * time_step / Decimal("4"))
+
+        self.banded_matrix = self._get_banded_matrix()
+
+    def _get_banded_matrix(self):
+        banded_matrix = np.zeros((3, self.size), dtype=np.float64)
+        banded_matrix[0, 1:] = -self.ratio
+        banded_matrix[1, :] = 1 + 2 * self.ratio + self.decay
+        banded_matrix[2, :-1] = -self.ratio
+        return banded_matrix
+
+    def _get_explicit_half_step(self, field: np.ndarray, axis: int):
+        result = (1 - 2 * self.ratio - self.decay) * field
+        if axis == 0:
+            result[1:, :] += self.ratio * field[:-1, :]
+            result[:-1, :] += self.ratio * field[1:, :]
+        else:
+            result[:, 1:] += self.ratio * field[:, :-1]
+            result[:, :-1] += self.ratio * field[:, 1:]
+        return result
+
+    def _solve_implicit_half_step(self, right_side: np.ndarray):
+        # solves all columns (one system for every column) at once
+        return solve_banded(
+            (1, 1),
+            self.banded_matrix,
+            right_side,
+            overwrite_b=True,
+            check_finite=False,
+        )
+
+    def diffuse(self, field: np.ndarray):
+        """Advances the field by one time step in place."""
+        # implicit in x (axis 0), explicit in y (axis 1)
+        half_step = self._solve_implicit_half_step(
+            self._get_explicit_half_step(field, axis=1)
+        )
+        # implicit in y, explicit in x
+        field[:, :] = self._solve_implicit_half_step(
+            self._get_explicit_half_step(half_step, axis=0).T
+        ).T
+        remove_round_off_values(field)
+
+
+@lru_cache(maxsize=16)
+def get_diffusion_transfer_function(
+    shape: tuple,
+    is_sine_transform: bool,
+    numerical_step_size: float,
+    diffusion_constant: float,
+    time: float,
+):
+    """
+    Exact propagator of the 5-point discrete Laplacian over the given time.
+    For the sine transform (type I) values outside of the field are zero,
+    otherwise the field is periodic (real FFT of the given shape).
+    The result is shared between solvers, so it is read only.
+    """
+    if is_sine_transform:
+        frequencies_x = np.pi * np.arange(1, shape[0] + 1) / (shape[0] + 1)
+        frequencies_y = np.pi * np.arange(1, shape[1] + 1) / (shape[1] + 1)
+    else:
+        frequencies_x = 2 * np.pi * fft.fftfreq(shape[0])
+        frequencies_y = 2 * np.pi * fft.rfftfreq(shape[1])
+    eigenvalues = (2 - 2 * np.cos(frequencies_x))[:, np.newaxis] + (
+        2 - 2 * np.cos(frequencies_y)
+    )[np.newaxis, :]
+    transfer_function = np.exp(
+        -diffusion_constant * time * eigenvalues / numerical_step_size**2
+    )
+    transfer_function.flags.writeable = False
+    return transfer_function
+
+
+class SpectralDiffusionSolver:
+    """
+    Diffusion with decay over the whole ant step as one multiplication in spectral space.
+    Diffusion is exact for the discrete Laplacian, decay is the same as in the explicit
+    scheme (decay multiplicator for every diffusion step).
+    Boundary:
+    - ABSORBING: sine transform, zero values outside of the field as in the explicit scheme
+    - ZERO_PADDING: padded FFT, pheromone leaving the field is dropped after every step
+    - PERIODIC: FFT of the field itself
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        diffusion_constant: Decimal,
+        decay_multiplicator: Decimal,
+        time_step: Decimal,
+        boundary: str = SpectralBoundaryType.ABSORBING,
+    ):
+        """
+        time_step: time of diffusion in one ant step
+        """
+        self.size = settings.NUMERICAL_ARRAY_SIZE
+        number_of_steps = settings.NUMBER_OF_DIFFUSIONS_IN_STEP
+        self.time_step = time_step
+        numerical_step_size = float(settings.NUMERICAL_STEP_SIZE)
+
+        self.boundary = boundary
+        self.is_sine_transform = boundary == SpectralBoundaryType.ABSORBING
+        if self.is_sine_transform or boundary == SpectralBoundaryType.PERIODIC:
+            self.shape = (self.size, self.size)
+        elif boundary == SpectralBoundaryType.ZERO_PADDING:
+            padding = self.get_padding(
+                float(diffusion_constant), float(self.time_step), numerical_step_size
+            )
+            fft_size = fft.next_fast_len(self.size + padding, real=True)
+            self.shape = (fft_size, fft_size)
+        else:
+            raise NotImplementedError(
+                'Unknown spectral boundary type "' + str(boundary) + '".'
+            )
+
+        self.transfer_function = get_diffusion_transfer_function(
+            self.shape,
+            self.is_sine_transform,
+            numerical_step_size,
+            float(diffusion_constant),
+            float(self.time_step),
+        ) * (float(decay_multiplicator) ** number_of_steps)
+
+    @staticmethod
+    def get_padding(diffusion_constant: float, time: float, numerical_step_size: float):
+        # 4 sigma of the diffusion kernel, on both sides (FFT wraps around)
+        reach = 4 * math.sqrt(2 * diffusion_constant * time) / numerical_step_size
+        return 2 * (math.ceil(reach) + 1)
+
+    def diffuse(self, field: np.ndarray):
+        """
+        Advances the field by one time step in place, negative values and
+        round-off errors of the transform are set to zero.
+        """
+        if self.is_sine_transform:
+            spectrum = fft.dstn(field, type=1)
+            spectrum *= self.transfer_function
+            field[:, :] = fft.idstn(spectrum, type=1)
+        else:
+            spectrum = fft.rfft2(field, s=self.shape)
+            spectrum *= self.transfer_function
+            field[:, :] = fft.irfft2(spectrum, s=self.shape)[: self.size, : self.size]
+        remove_round_off_values(field)
+
+    @staticmethod
+    def diffuse_stacked(solvers: list, fields: np.ndarray):
+        """
+        Advances stacked fields (channel, x, y) in place, channels with the same
+        boundary are transformed at once, otherwise they are diffused one by one.
+        """
+        if len({(solver.boundary, solver.shape) for solver in solvers}) != 1:
+            for solver, field in zip(solvers, fields):
+                solver.diffuse(field)
+            return
+
+        transfer_functions = np.stack([solver.transfer_function for solver in solvers])
+        solver = solvers[0]
+        if solver.is_sine_transform:
+            spectrum = fft.dstn(fields, type=1, axes=(1, 2))
+            spectrum *= transfer_functions
+            fields[:, :, :] = fft.idstn(spectrum, type=1, axes=(1, 2))
+        else:
+            spectrum = fft.rfft2(fields, s=solver.shape, axes=(1, 2))
+            spectrum *= transfer_functions
+            fields[:, :, :] = fft.irfft2(spectrum, s=solver.shape, axes=(1, 2))[
+                :, : solver.size, : solver.size
+            ]
+        remove_round_off_values(fields, axes=(1, 2))
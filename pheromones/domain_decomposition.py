@@ -0,0 +1,186 @@
+import weakref
+from multiprocessing import Barrier, Pipe, Process, RawArray
+import numpy as np
+
+from settings import Settings, DiffusionSolverType, PheromoneStorageType
+from .pheromone import create_accumulation_buffer, diffuse_window
+
+# seconds a worker waits for other workers to finish a diffusion step, after that
+# the barrier is broken and workers stop, so a dead worker can not hang the run
+DIFFUSION_WORKER_TIMEOUT = 60
+# seconds between checks of worker processes while the main process waits for them
+WORKER_POLL_INTERVAL = 0.1
+
+
+def run_diffusion_worker(
+    connection,
+    barrier,
+    buffers: list,
+    dtype: str,
+    size: int,
+    rows: list,
+    coefficients: list,
+):
+    """
+    Diffuses rows [start_x, end_x) of all fields (buffers of two padded fields).
+    Messages: [number of diffusion steps, index of the current buffer], None stops
+    the worker. After every diffusion step workers wait for each other, so rows
+    of neighbouring strips (halo) are read only when they are complete.
+    If other workers do not reach the barrier in DIFFUSION_WORKER_TIMEOUT seconds,
+    threading.BrokenBarrierError stops the worker.
+    """
+    fields = [
+        np.frombuffer(buffer, dtype=dtype).reshape(2, size + 2, size + 2)
+        for buffer in buffers
+    ]
+    accumulation_buffer = (
+        None if np.dtype(dtype) == np.float64 else create_accumulation_buffer(size)
+    )
+    window = [rows[0], rows[1], 0, size]
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        [number_of_steps, buffer_index] = message
+        for _ in range(number_of_steps):
+            for field, field_coefficients in zip(fields, coefficients):
+                diffuse_window(
+                    field[buffer_index],
+                    field[1 - buffer_index],
+                    window,
+                    field_coefficients,
+                    accumulation_buffer,
+                )
+            barrier.wait(DIFFUSION_WORKER_TIMEOUT)
+            buffer_index = 1 - buffer_index
+        connection.send(buffer_index)
+    connection.close()
+
+
+def stop_diffusion_workers(connections: list, processes: list):
+    for connection in connections:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(DIFFUSION_WORKER_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+class DecomposedDiffusion:
+    """
+    Explicit diffusion of float fields split into strips of rows,
+    every strip is diffused by its worker process (DIFFUSION_PROCESSES).
+    Both buffers of every field are in shared memory, so deposits and sampling
+    of Pheromone objects work on the same values as workers.
+    """
+
+    def __init__(self, settings: Settings, pheromones: list):
+        if (
+            pheromones[0].is_decimal
+            or settings.DIFFUSION_SOLVER_TYPE != DiffusionSolverType.EXPLICIT
+            or settings.PHEROMONE_STORAGE_TYPE != PheromoneStorageType.SEPARATE
+            or settings.DIFFUSION_ACTIVE_REGION
+        ):
+            raise NotImplementedError(
+                "Diffusion in processes is available only for explicit diffusion"
+                " of float fields with SEPARATE storage and without active region."
+            )
+        self.settings = settings
+        self.size = settings.NUMERICAL_ARRAY_SIZE
+        self.pheromones = pheromones
+        self.buffer_index = 0
+
+        dtype = pheromones[0].field_dtype
+        buffers = []
+        self.fields = []
+        for pheromone in pheromones:
+            buffer = RawArray("b", 2 * (self.size + 2) ** 2 * np.dtype(dtype).itemsize)
+            field = np.frombuffer(buffer, dtype=dtype).reshape(
+                2, self.size + 2, self.size + 2
+            )
+            field[0, 1:-1, 1:-1] = pheromone.current_field
+            buffers.append(buffer)
+            self.fields.append(field)
+        self._set_pheromone_fields()
+
+        number_of_processes = min(settings.DIFFUSION_PROCESSES, self.size)
+        strips = np.linspace(0, self.size, number_of_processes + 1).astype(int)
+        barrier = Barrier(number_of_processes)
+        self.connections = []
+        self.processes = []
+        for start_x, end_x in zip(strips[:-1], strips[1:]):
+            connection, worker_connection = Pipe()
+            process = Process(
+                target=run_diffusion_worker,
+                args=(
+                    worker_connection,
+                    barrier,
+                    buffers,
+                    np.dtype(dtype).str,
+                    self.size,
+                    [int(start_x), int(end_x)],
+                    [
+                        pheromone.get_diffusion_coefficients()
+                        for pheromone in pheromones
+                    ],
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self._finalizer = weakref.finalize(
+            self, stop_diffusion_workers, self.connections, self.processes
+        )
+
+    def _set_pheromone_fields(self):
+        for pheromone, field in zip(self.pheromones, self.fields):
+            pheromone.set_padded_fields(
+                [field[self.buffer_index], field[1 - self.buffer_index]]
+            )
+
+    def diffuse(self, number_of_steps: int = 1):
+        for pheromone in self.pheromones:
+            pheromone.apply_deferred_deposits()
+        for connection in self.connections:
+            try:
+                connection.send([number_of_steps, self.buffer_index])
+            except (BrokenPipeError, OSError):
+                # ended worker is reported by _receive
+                pass
+        for connection in self.connections:
+            self.buffer_index = self._receive(connection)
+        self._set_pheromone_fields()
+
+    def _receive(self, connection):
+        """
+        Waits for the message of the worker, raises RuntimeError (and stops all
+        workers) if any worker process has ended.
+        """
+        while not connection.poll(WORKER_POLL_INTERVAL):
+            if not all(process.is_alive() for process in self.processes):
+                break
+        else:
+            try:
+                return connection.recv()
+            except EOFError:
+                pass
+        exit_codes = [process.exitcode for process in self.processes]
+        for process in self.processes:
+            process.terminate()
+        self.close()
+        raise RuntimeError(
+            "Diffusion worker process ended, exit codes: " + str(exit_codes) + "."
+        )
+
+    # diffusion for the whole ant step
+    def diffuse_step(self):
+        self.diffuse(self.settings.NUMBER_OF_DIFFUSIONS_IN_STEP)
+
+    def close(self):
+        """Stops worker processes, fields stay available in the main process."""
+        self._finalizer()
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from settings import Settings
+from .grid_cells import get_grid_cells, get_grid_points_for_positions
+from .grid_points import GaussianTemplate
+
+
+class GaussianStampCache:
+    """
+    Gaussian templates of all four grid points around a position, combined into one
+    stamp with their influence rates. Stamps depend only on the position inside
+    the grid cell, which is quantized to GAUSSIAN_STAMP_RESOLUTION bins per grid step
+    (stamp of a bin is created for its center, bins never cross the grid lines,
+    because influence rates are not continuous there).
+    At most GAUSSIAN_STAMP_CACHE_SIZE stamps are kept (least recently used are removed).
+    Stamp for a position in the cell [x, y] starts at the grid point [x - radius, y - radius].
+    """
+
+    def __init__(self, gaussian_template: GaussianTemplate, settings: Settings):
+        self.numerical_step_size = settings.NUMERICAL_STEP_SIZE
+        self.resolution = settings.GAUSSIAN_STAMP_RESOLUTION
+        self.max_size = settings.GAUSSIAN_STAMP_CACHE_SIZE
+
+        self.template = np.asarray(gaussian_template.template, dtype=np.float64)
+        self.radius = (self.template.shape[0] - 1) // 2
+        self.size = self.template.shape[0] + 1
+
+        self.stamps = OrderedDict()
+
+    def get_cells_and_offsets(self, positions: np.ndarray):
+        """
+        Grid cells (n, 2) of real positions (n, 2) and quantized offsets (n, 2)
+        of the positions inside of their cells, from 0 to resolution - 1.
+        """
+        cells = get_grid_cells(positions, self.numerical_step_size)
+        fractions = positions / float(self.numerical_step_size) - cells
+        offsets = np.floor(fractions * self.resolution).astype(np.int64)
+        return cells, np.clip(offsets, 0, self.resolution - 1)
+
+    def create_stamp(self, fraction_x: float, fraction_y: float):
+        """Exact stamp for the position [fraction_x, fraction_y] inside of the grid cell."""
+        step_size = float(self.numerical_step_size)
+        (
+            grid_points_x,
+            grid_points_y,
+            _,
+            influence_rates,
+        ) = get_grid_points_for_positions(
+            np.array([[fraction_x * step_size, fraction_y * step_size]]),
+            self.numerical_step_size,
+        )
+        stamp = np.zeros((self.size, self.size), dtype=np.float64)
+        template_size = self.template.shape[0]
+        for x, y, influence_rate in zip(
+            grid_points_x[0], grid_points_y[0], influence_rates[0]
+        ):
+            stamp[x : x + template_size, y : y + template_size] += (
+                influence_rate * self.template
+            )
+        return stamp
+
+    def get_stamp(self, offset_x: int, offset_y: int):
+        key = (int(offset_x), int(offset_y))
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            stamp = self.create_stamp(
+                (key[0] + 0.5) / self.resolution, (key[1] + 0.5) / self.resolution
+            )
+            self.stamps[key] = stamp
+            if len(self.stamps) > self.max_size:
+                self.stamps.popitem(last=False)
+        else:
+            self.stamps.move_to_end(key)
+        return stamp
+
+    def get_stamps(self, positions: np.ndarray):
+        """Grid cells (n, 2) and stamps (n, size, size) for real positions (n, 2)."""
+        cells, offsets = self.get_cells_and_offsets(positions)
+        keys, inverse = np.unique(
+            offsets[:, 0] * self.resolution + offsets[:, 1], return_inverse=True
+        )
+        unique_stamps = np.array(
+            [self.get_stamp(*divmod(key, self.resolution)) for key in keys]
+        ).reshape(-1, self.size, self.size)
+        return cells, unique_stamps[inverse.ravel()]
+
+
+def get_gaussian_stamp_accuracy_report(
+    settings: Settings, number_of_positions: int = 1000, seed: int = 0
+):
+    """
+    Compares cached (quantized) stamps with exact stamps for random positions
+    inside of a grid cell. Errors are relative to the maximum of the exact stamp.
+    """
+    stamp_cache = GaussianStampCache(GaussianTemplate(settings), settings)
+    fractions = np.random.default_rng(seed).random((number_of_positions, 2))
+    positions = fractions * float(settings.NUMERICAL_STEP_SIZE)
+    _, stamps = stamp_cache.get_stamps(positions)
+
+    max_errors = []
+    total_errors = []
+    for fraction, stamp in zip(fractions, stamps):
+        exact_stamp = stamp_cache.create_stamp(fraction[0], fraction[1])
+        error = np.abs(stamp - exact_stamp)
+        max_errors.append(np.max(error) / np.max(exact_stamp))
+        total_errors.append(np.sum(error) / np.sum(exact_stamp))
+
+    return {
+        "resolution": stamp_cache.resolution,
+        "stamp_size": stamp_cache.size,
+        "number_of_positions": number_of_positions,
+        "max_relative_error": float(np.max(max_errors)),
+        "mean_relative_error": float(np.mean(max_errors)),
+        "max_total_relative_error": float(np.max(total_errors)),
+        "mean_total_relative_error": float(np.mean(total_errors)),
+    }
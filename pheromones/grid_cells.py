@@ -0,0 +1,57 @@
+import math
+from decimal import Decimal
+
+import numpy as np
+
+# offsets of grid points in the order of GridPointsForPosition.grid_points
+GRID_POINTS_OFFSETS_X = np.array([0, 1, 1, 0])
+GRID_POINTS_OFFSETS_Y = np.array([0, 0, 1, 1])
+
+# grid coordinates closer to an integer than this (relative) are considered
+# to be on the grid line, as if they were calculated without rounding errors
+GRID_LINE_TOLERANCE = 4 * np.finfo(np.float64).eps
+
+
+def get_smaller_grid_point(position: Decimal, numerical_step_size: Decimal):
+    """Index of the nearest grid point smaller than or equal to the position."""
+    return math.floor(position / numerical_step_size)
+
+
+def get_larger_grid_point(position: Decimal, numerical_step_size: Decimal):
+    """Index of the nearest grid point larger than or equal to the position."""
+    return math.ceil(position / numerical_step_size)
+
+
+def get_grid_cells(positions: np.ndarray, numerical_step_size):
+    """
+    Vectorized get_smaller_grid_point for real positions (any shape).
+    Returns integer indices of grid cells (their top left grid points).
+    """
+    grid_positions = np.asarray(positions, dtype=np.float64) / float(
+        numerical_step_size
+    )
+    cells = np.floor(grid_positions)
+    nearest_grid_lines = np.rint(grid_positions)
+    is_on_grid_line = np.abs(
+        grid_positions - nearest_grid_lines
+    ) <= GRID_LINE_TOLERANCE * np.maximum(np.abs(grid_positions), 1)
+    return np.where(is_on_grid_line, nearest_grid_lines, cells).astype(np.int64)
+
+
+def get_grid_points_for_positions(positions: np.ndarray, numerical_step_size):
+    """
+    Vectorized GridPointsForPosition for real positions (n, 2).
+    Returns grid points x, y, distances and influence rates, arrays (n, 4).
+    """
+    step_size = float(numerical_step_size)
+    max_distance = 2 * step_size
+    cells = get_grid_cells(positions, numerical_step_size)
+    grid_points_x = cells[:, 0:1] + GRID_POINTS_OFFSETS_X
+    grid_points_y = cells[:, 1:2] + GRID_POINTS_OFFSETS_Y
+    distances = np.hypot(
+        positions[:, 0:1] - grid_points_x * step_size,
+        positions[:, 1:2] - grid_points_y * step_size,
+    )
+    influence_rates = 1 - distances / max_distance
+    influence_rates /= influence_rates.sum(axis=1, keepdims=True)
+    return grid_points_x, grid_points_y, distances, influence_rates
@@ -6,6 +6,24 @@ import scipy.stats as stats
 from typing import List
 from helper_functions import get_point_distance
 from settings import Settings
+from .grid_cells import get_larger_grid_point, get_smaller_grid_point
+
+
+def get_positions_on_paths(
+    start_positions: np.ndarray, directions: np.ndarray, settings: Settings
+):
+    """
+    Vectorized positions of PheromoneGaussians and GridPointsForPath.
+    Returns array (number of paths, PHEROMONE_POINTS_IN_STEP, 2).
+    """
+    number_of_positions = settings.PHEROMONE_POINTS_IN_STEP
+    points_distance = float(settings.STEP_LENGTH / number_of_positions)
+    deltas = points_distance * np.stack([np.cos(directions), np.sin(directions)], 1)
+    steps = np.arange(1, number_of_positions + 1)
+    return (
+        start_positions[:, np.newaxis, :]
+        + steps[np.newaxis, :, np.newaxis] * deltas[:, np.newaxis, :]
+    )
 
 
 class GridPoint:
@@ -108,26 +126,10 @@ class GridPoints:
         ]
 
     def get_smaller_grid_point_in_one_direction(self, position):
-        if position % self.numerical_step_size == 0:
-            return position / self.numerical_step_size
-        point = math.floor(position)
-        # necessary if the step is greater than 1
-        while (point % self.numerical_step_size) != 0:
-            point = point - 1
-        while (position - point) > self.numerical_step_size:
-            point = point + self.numerical_step_size
-        return point / self.numerical_step_size
+        return get_smaller_grid_point(position, self.numerical_step_size)
 
     def get_larger_grid_point_in_one_direction(self, position):
-        if position % self.numerical_step_size == 0:
-            return position / self.numerical_step_size
-        point = math.ceil(position)
-        # necessary if the step is greater than 1
-        while (point % self.numerical_step_size) != 0:
-            point = point + 1
-        while (point - position) > self.numerical_step_size:
-            point = point - self.numerical_step_size
-        return point / self.numerical_step_size
+        return get_larger_grid_point(position, self.numerical_step_size)
 
     def set_distance_to_points(self, position):
         for grid_point in self.grid_points:
@@ -247,15 +249,7 @@ class GaussianTemplate:
         self.set_template()
 
     def get_gaussian_radius(self, real_radius):
-        if real_radius % self.numerical_step_size == 0:
-            return real_radius / self.numerical_step_size
-        grid_radius = math.ceil(real_radius)
-        # necessary if the step is greater than 1
-        while (grid_radius % self.numerical_step_size) != 0:
-            grid_radius += 1
-        while (grid_radius - real_radius) > self.numerical_step_size:
-            grid_radius -= self.numerical_step_size
-        return grid_radius / self.numerical_step_size
+        return get_larger_grid_point(real_radius, self.numerical_step_size)
 
     def set_template(self):
         radius = self.get_gaussian_radius(self.max_distance_num)
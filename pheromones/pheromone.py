@@ -1,14 +1,124 @@
 from decimal import Decimal
 import numpy as np
+from scipy.signal import fftconvolve
 
-from settings import Settings
+from settings import (
+    Settings,
+    PheromoneFieldType,
+    DiffusionSolverType,
+    PheromoneReleaseType,
+    PheromoneStorageType,
+)
+from .diffusion_solvers import AdiDiffusionSolver, SpectralDiffusionSolver
 from .grid_points import (
     Gaussian,
     PheromoneGaussians,
     GridPointsForPosition,
     GridPoint,
     GridPointsForPath,
+    get_positions_on_paths,
 )
+from .grid_cells import get_grid_points_for_positions
+from .gaussian_stamps import GaussianStampCache
+from .tiled_field import TiledField
+
+# FLOAT32 fields: rows of the diffusion window accumulated in float64 at once
+ACCUMULATION_BLOCK_ROWS = 256
+
+
+def add_values_to_grid_points(
+    field: np.ndarray,
+    grid_points_x: np.ndarray,
+    grid_points_y: np.ndarray,
+    values: np.ndarray,
+):
+    """
+    Adds values to grid points (1D arrays) of the float field with one scatter.
+    Grid points outside of the field are skipped.
+    Returns changed window [start_x, end_x, start_y, end_y] or None.
+    """
+    is_inside = (
+        (grid_points_x >= 0)
+        & (grid_points_x < field.shape[0])
+        & (grid_points_y >= 0)
+        & (grid_points_y < field.shape[1])
+    )
+    if not np.any(is_inside):
+        return None
+    grid_points_x = grid_points_x[is_inside]
+    grid_points_y = grid_points_y[is_inside]
+
+    start_x, end_x = int(grid_points_x.min()), int(grid_points_x.max()) + 1
+    start_y, end_y = int(grid_points_y.min()), int(grid_points_y.max()) + 1
+    window_shape = (end_x - start_x, end_y - start_y)
+    window_values = np.bincount(
+        (grid_points_x - start_x) * window_shape[1] + (grid_points_y - start_y),
+        weights=values[is_inside],
+        minlength=window_shape[0] * window_shape[1],
+    )
+    field[start_x:end_x, start_y:end_y] += window_values.reshape(window_shape)
+    return [start_x, end_x, start_y, end_y]
+
+
+def create_accumulation_buffer(size: int):
+    return np.zeros((ACCUMULATION_BLOCK_ROWS, size), dtype=np.float64)
+
+
+def _get_diffusion_rows(
+    field: np.ndarray, window: list, next_field: np.ndarray, coefficients: list
+):
+    [multiplicator, center_multiplicator, neighbours_ratio] = coefficients
+    [start_x, end_x, start_y, end_y] = window
+    columns = slice(start_y + 1, end_y + 1)
+    rows = slice(start_x + 1, end_x + 1)
+
+    np.add(
+        field[start_x:end_x, columns],
+        field[start_x + 2 : end_x + 2, columns],
+        out=next_field,
+        dtype=next_field.dtype,
+    )
+    next_field += field[rows, start_y:end_y]
+    next_field += field[rows, start_y + 2 : end_y + 2]
+    if neighbours_ratio is None:
+        next_field *= multiplicator
+    else:
+        next_field *= neighbours_ratio
+        next_field += field[rows, columns]
+        next_field *= center_multiplicator
+
+
+def diffuse_window(
+    field: np.ndarray,
+    next_field: np.ndarray,
+    window: list,
+    coefficients: list,
+    accumulation_buffer: np.ndarray = None,
+):
+    """
+    Explicit diffusion step of the window [start_x, end_x, start_y, end_y]
+    of the padded field, next values are written to the window of padded next_field.
+    coefficients: [multiplicator, center_multiplicator, neighbours_ratio]
+    Float32 values are accumulated in float64 accumulation_buffer by blocks of rows.
+    """
+    [start_x, end_x, start_y, end_y] = window
+    # padded field is shifted by one grid point
+    columns = slice(start_y + 1, end_y + 1)
+    if accumulation_buffer is None:
+        _get_diffusion_rows(
+            field, window, next_field[start_x + 1 : end_x + 1, columns], coefficients
+        )
+        return
+
+    for block_start_x in range(start_x, end_x, ACCUMULATION_BLOCK_ROWS):
+        block_end_x = min(block_start_x + ACCUMULATION_BLOCK_ROWS, end_x)
+        next_rows = accumulation_buffer[
+            : block_end_x - block_start_x, : end_y - start_y
+        ]
+        _get_diffusion_rows(
+            field, [block_start_x, block_end_x, start_y, end_y], next_rows, coefficients
+        )
+        next_field[block_start_x + 1 : block_end_x + 1, columns] = next_rows
 
 
 class Pheromone:
@@ -18,48 +128,274 @@ class Pheromone:
         pde_decay: Decimal,
         diffusion_constant: Decimal,
         current_field=None,
+        fields_folder: str = None,
+        name: str = "pheromone",
     ):
         self.size = settings.NUMERICAL_ARRAY_SIZE
         self.settings = settings
-        self.current_field = (
-            current_field
-            if current_field is not None
-            else self._generate_pheromone_field(settings.NUMERICAL_ARRAY_SIZE)
+        self.field_type = settings.PHEROMONE_FIELD_TYPE
+        self.is_decimal = self.field_type == PheromoneFieldType.DECIMAL
+        if not self.is_decimal and self.field_type not in [
+            PheromoneFieldType.FLOAT64,
+            PheromoneFieldType.FLOAT32,
+        ]:
+            raise NotImplementedError(
+                'Unknown pheromone field type "' + str(self.field_type) + '".'
+            )
+        self.field_dtype = (
+            np.float32 if self.field_type == PheromoneFieldType.FLOAT32 else np.float64
+        )
+        # FLOAT32: float64 buffer for blocks of rows of diffusion
+        self._accumulation_buffer = None
+        # float fields live inside buffers with a zero ghost border,
+        # diffusion writes into the second buffer and swaps them
+        self._padded_fields = None
+        self._inner_fields = None
+        # TILED storage: float field in tiles, current_field is None
+        self.tiled_field = None
+        # MEMORY_MAPPED storage: folder of files with buffers ({name}_*.npy)
+        self.name = name
+        self.fields_folder = (
+            fields_folder
+            if settings.PHEROMONE_STORAGE_TYPE == PheromoneStorageType.MEMORY_MAPPED
+            else None
         )
+        self.current_field = self._get_initial_field(current_field)
 
         self.diffusion_constant = diffusion_constant
         self.pde_decay = pde_decay
-        self.decay_multiplicator = Decimal("1") - (
-            self.settings.DIFFUSION_DELTA_T * self.pde_decay
+        self.decay_multiplicator = self._to_field_value(
+            Decimal("1") - (self.settings.DIFFUSION_DELTA_T * self.pde_decay)
         )
-        self.multiplicator = (
+        self.multiplicator = self._to_field_value(
             self.diffusion_constant
             * self.settings.DIFFUSION_DELTA_T
             / (self.settings.NUMERICAL_STEP_SIZE ** Decimal("2"))
         )
+        # next = center_multiplicator * (field + neighbours_ratio * neighbours)
+        self.center_multiplicator = self.decay_multiplicator - 4 * self.multiplicator
+        self.neighbours_ratio = (
+            self.multiplicator / self.center_multiplicator
+            if self.center_multiplicator != 0
+            else None
+        )
+        self.diffusion_solver = self._get_diffusion_solver()
+
+        # grid window [start_x, end_x, start_y, end_y) outside of which the field
+        # is zero (None when it is zero everywhere), explicit float diffusion only
+        self.is_tracking_active_region = (
+            settings.DIFFUSION_ACTIVE_REGION
+            and not self.is_decimal
+            and self.diffusion_solver is None
+            and self.tiled_field is None
+        )
+        self.minimum_detectable_pheromone = float(settings.MINIMUM_DETECTABLE_PHEROMONE)
+        self.active_region = (
+            [0, self.size, 0, self.size] if np.any(self.current_field) else None
+        )
 
         self.gaussian_template = None
+        self.gaussian_template_array = None
+        self.gaussian_stamp_cache = None
+        # GAUSSIAN_DEFERRED: amounts for grid points, padded by the gaussian radius
+        self.deferred_deposits = None
+        self.deferred_region = None
+
+    def get_diffusion_time_in_step(self):
+        """
+        Time of diffusion in one ant step, the same for all diffusion solvers
+        (NUMBER_OF_DIFFUSIONS_IN_STEP explicit steps of DIFFUSION_DELTA_T).
+        """
+        return (
+            self.settings.NUMBER_OF_DIFFUSIONS_IN_STEP * self.settings.DIFFUSION_DELTA_T
+        )
+
+    def _get_diffusion_solver(self):
+        solver_type = self.settings.DIFFUSION_SOLVER_TYPE
+        if solver_type == DiffusionSolverType.EXPLICIT:
+            return None
+        if self.tiled_field is not None:
+            raise NotImplementedError(
+                'Diffusion solver "'
+                + str(solver_type)
+                + '" is not available for tiled pheromone field.'
+            )
+        if self.is_decimal:
+            raise NotImplementedError(
+                'Diffusion solver "'
+                + str(solver_type)
+                + '" is not available for Decimal pheromone field.'
+            )
+        if solver_type == DiffusionSolverType.ADI:
+            return AdiDiffusionSolver(
+                self.settings,
+                self.diffusion_constant,
+                self.pde_decay,
+                self.get_diffusion_time_in_step(),
+            )
+        if solver_type == DiffusionSolverType.SPECTRAL:
+            return SpectralDiffusionSolver(
+                self.settings,
+                self.diffusion_constant,
+                self.decay_multiplicator,
+                self.get_diffusion_time_in_step(),
+                boundary=self.settings.SPECTRAL_DIFFUSION_BOUNDARY,
+            )
+        raise NotImplementedError(
+            'Unknown diffusion solver type "' + str(solver_type) + '".'
+        )
 
     def set_gaussian_template(self, template):
         self.gaussian_template = template
+        self.gaussian_template_array = np.asarray(template.template, dtype=np.float64)
+
+    def set_gaussian_stamp_cache(self, stamp_cache: GaussianStampCache):
+        self.gaussian_stamp_cache = stamp_cache
 
     @staticmethod
-    def _generate_pheromone_field(size: int):
-        return np.zeros((size, size), dtype=np.dtype(Decimal))
+    def _generate_pheromone_field(size: int, is_decimal: bool = True, dtype=np.float64):
+        if is_decimal:
+            return np.zeros((size, size), dtype=np.dtype(Decimal))
+        return np.zeros((size, size), dtype=dtype)
+
+    def _get_initial_field(self, current_field):
+        if self.settings.PHEROMONE_STORAGE_TYPE == PheromoneStorageType.TILED:
+            if self.is_decimal:
+                raise NotImplementedError(
+                    "Tiled storage is not available for Decimal pheromone field."
+                )
+            self.tiled_field = TiledField(
+                self.size, self.settings.PHEROMONE_TILE_SIZE, dtype=self.field_dtype
+            )
+            if current_field is not None:
+                self.tiled_field.add_window(
+                    0, 0, np.asarray(current_field, dtype=np.float64)
+                )
+            return None
+
+        if self.settings.PHEROMONE_STORAGE_TYPE == PheromoneStorageType.MEMORY_MAPPED:
+            if self.is_decimal:
+                raise NotImplementedError(
+                    "Memory mapped storage is not available for Decimal pheromone field."
+                )
+            if self.fields_folder is None:
+                raise ValueError("Folder of memory mapped pheromone fields is not set.")
+
+        if self.is_decimal:
+            if current_field is None:
+                return self._generate_pheromone_field(self.size)
+            return current_field
+
+        self._padded_fields = [
+            self._create_float_buffer(self.size + 2, "field_0", self.field_dtype),
+            self._create_float_buffer(self.size + 2, "field_1", self.field_dtype),
+        ]
+        self._inner_fields = [field[1:-1, 1:-1] for field in self._padded_fields]
+        if current_field is not None:
+            self._inner_fields[0][:, :] = np.asarray(current_field, dtype=np.float64)
+        return self._inner_fields[0]
+
+    def _create_float_buffer(self, size: int, buffer_name: str, dtype=np.float64):
+        if self.fields_folder is None:
+            return self._generate_pheromone_field(size, is_decimal=False, dtype=dtype)
+        # new file is filled with zeros, it can be opened by np.load
+        return np.lib.format.open_memmap(
+            f"{self.fields_folder}/{self.name}_{buffer_name}.npy",
+            mode="w+",
+            dtype=dtype,
+            shape=(size, size),
+        )
+
+    def set_padded_fields(self, padded_fields: list):
+        """
+        Float field only, the field is stored in given buffers with zero ghost border
+        (e.g. channels of PheromoneStack), values are not copied.
+        """
+        self._padded_fields = padded_fields
+        self._inner_fields = [field[1:-1, 1:-1] for field in padded_fields]
+        self.current_field = self._inner_fields[0]
+
+    def _add_to_field_window(self, start_x: int, start_y: int, values: np.ndarray):
+        """Adds values (2D array) to the window of the field starting at the grid point."""
+        if self.tiled_field is not None:
+            self.tiled_field.add_window(start_x, start_y, values)
+            return
+        self.current_field[
+            start_x : start_x + values.shape[0], start_y : start_y + values.shape[1]
+        ] += values
+
+    def _to_field_value(self, value):
+        return Decimal(value) if self.is_decimal else float(value)
+
+    def _to_field_array(self, array: np.ndarray):
+        return array if self.is_decimal else array.astype(np.float64)
+
+    def _expand_active_region(self, start_x: int, end_x: int, start_y: int, end_y: int):
+        if not self.is_tracking_active_region:
+            return
+        if self.active_region is not None:
+            start_x = min(start_x, self.active_region[0])
+            end_x = max(end_x, self.active_region[1])
+            start_y = min(start_y, self.active_region[2])
+            end_y = max(end_y, self.active_region[3])
+        self.active_region = [
+            max(start_x, 0),
+            min(end_x, self.size),
+            max(start_y, 0),
+            min(end_y, self.size),
+        ]
+
+    def _shrink_active_region(self):
+        if self.active_region is None:
+            return
+        [start_x, end_x, start_y, end_y] = self.active_region
+        is_detectable = (
+            self.current_field[start_x:end_x, start_y:end_y]
+            >= self.minimum_detectable_pheromone
+        )
+        rows = np.flatnonzero(is_detectable.any(axis=1))
+        columns = np.flatnonzero(is_detectable.any(axis=0))
+
+        # values outside of the new region are not detectable, they are removed
+        # from both buffers, so the field stays zero outside of the region
+        for field in self._inner_fields:
+            window = field[start_x:end_x, start_y:end_y]
+            if rows.size == 0:
+                window[:, :] = 0
+                continue
+            window[: rows[0], :] = 0
+            window[rows[-1] + 1 :, :] = 0
+            window[:, : columns[0]] = 0
+            window[:, columns[-1] + 1 :] = 0
+
+        if rows.size == 0:
+            self.active_region = None
+        else:
+            self.active_region = [
+                start_x + int(rows[0]),
+                start_x + int(rows[-1]) + 1,
+                start_y + int(columns[0]),
+                start_y + int(columns[-1]) + 1,
+            ]
 
     def _get_pheromone_grid_point_value(self, i: int, j: int):
         if i < 0 or j < 0:
             return Decimal(0)
+        if self.tiled_field is not None:
+            return Decimal(self.tiled_field.get_values(np.array([i]), np.array([j]))[0])
         try:
-            return Decimal(self.current_field[i][j])
+            value = self.current_field[i][j]
         except IndexError:
             return Decimal(0)
+        # float32 values are not accepted by Decimal
+        return Decimal(value) if self.is_decimal else Decimal(float(value))
 
     def get_pheromone_grid_point(self, grid_point: GridPoint):
         return self._get_pheromone_grid_point_value(grid_point.x, grid_point.y)
 
     # position = real position [x, y], not grid
     def get_pheromone_value(self, position: list):
+        self.apply_deferred_deposits()
         pheromone_value = Decimal(0)
         for grid_point in GridPointsForPosition(
             self.settings.NUMERICAL_STEP_SIZE, position
@@ -69,13 +405,56 @@ class Pheromone:
             )
         return pheromone_value
 
+    def _get_grid_points_values(
+        self, grid_points_x: np.ndarray, grid_points_y: np.ndarray
+    ):
+        if self.tiled_field is not None:
+            return self.tiled_field.get_values(grid_points_x, grid_points_y)
+        # grid points outside of the field are read from the zero ghost border
+        field = self._padded_fields[0]
+        return field[
+            np.clip(grid_points_x + 1, 0, self.size + 1),
+            np.clip(grid_points_y + 1, 0, self.size + 1),
+        ]
+
+    def get_pheromone_values(self, positions: np.ndarray):
+        """
+        Pheromone values for many real positions (n, 2) at once,
+        same as get_pheromone_value for every position.
+        """
+        if self.is_decimal:
+            return np.array(
+                [self.get_pheromone_value(position) for position in positions],
+                dtype=object,
+            )
+        self.apply_deferred_deposits()
+        (
+            grid_points_x,
+            grid_points_y,
+            _,
+            influence_rates,
+        ) = get_grid_points_for_positions(positions, self.settings.NUMERICAL_STEP_SIZE)
+        return np.sum(
+            influence_rates
+            * self._get_grid_points_values(grid_points_x, grid_points_y),
+            axis=1,
+        )
+
     def _add_pheromone_to_grid_point(self, x: int, y: int, value: Decimal):
         if x < 0 or y < 0:
             return
+        if self.tiled_field is not None:
+            self._add_values_to_grid_points(
+                np.array([x]), np.array([y]), np.array([float(value)])
+            )
+            return
         try:
-            self.current_field[x][y] = self.current_field[x][y] + Decimal(value)
+            self.current_field[x][y] = self.current_field[x][y] + self._to_field_value(
+                value
+            )
         except IndexError:
-            pass
+            return
+        self._expand_active_region(x, x + 1, y, y + 1)
 
     def add_pheromone_to_position(
         self, start_position: list, direction: Decimal, amount_of_pheromone: Decimal
@@ -116,9 +495,19 @@ class Pheromone:
     def _add_gaussian_to_pheromone_field(self, gaussian: Gaussian):
         if gaussian.template is None:
             return
+        if self.tiled_field is not None:
+            self._add_to_field_window(
+                gaussian.start_x,
+                gaussian.start_y,
+                self._to_field_array(gaussian.template),
+            )
+            return
         self.current_field[
             gaussian.start_x : gaussian.end_x + 1, gaussian.start_y : gaussian.end_y + 1
-        ] += gaussian.template
+        ] += self._to_field_array(gaussian.template)
+        self._expand_active_region(
+            gaussian.start_x, gaussian.end_x + 1, gaussian.start_y, gaussian.end_y + 1
+        )
 
     def add_pheromone_with_gaussian(
         self, start_position: list, direction: Decimal, amount_of_pheromone: Decimal
@@ -133,18 +522,248 @@ class Pheromone:
         for gaussian in pheromone_gaussians.gaussians:
             self._add_gaussian_to_pheromone_field(gaussian)
 
+    def _add_values_to_grid_points(
+        self, grid_points_x: np.ndarray, grid_points_y: np.ndarray, values: np.ndarray
+    ):
+        """
+        Adds values to grid points (1D arrays) with one scatter, float field only.
+        Grid points outside of the field are skipped.
+        """
+        if self.tiled_field is not None:
+            self.tiled_field.add_values(grid_points_x, grid_points_y, values)
+            return
+        window = add_values_to_grid_points(
+            self.current_field, grid_points_x, grid_points_y, values
+        )
+        if window is not None:
+            self._expand_active_region(*window)
+
+    def _defer_gaussians_to_grid_points(
+        self, grid_points_x: np.ndarray, grid_points_y: np.ndarray, amounts: np.ndarray
+    ):
+        """
+        Gaussians are not added immediately, amounts are accumulated in the grid points
+        and all gaussians are added with one convolution before the field is used.
+        Grid points up to the gaussian radius outside of the field are kept.
+        """
+        if self.is_decimal:
+            raise NotImplementedError(
+                "Deferred gaussians are not available for Decimal pheromone field."
+            )
+        radius = (self.gaussian_template_array.shape[0] - 1) // 2
+        if self.deferred_deposits is None:
+            self.deferred_deposits = self._create_float_buffer(
+                self.size + 2 * radius, "deferred_deposits"
+            )
+        window = add_values_to_grid_points(
+            self.deferred_deposits,
+            grid_points_x + radius,
+            grid_points_y + radius,
+            amounts,
+        )
+        if window is None:
+            return
+        if self.deferred_region is not None:
+            window = [
+                min(window[0], self.deferred_region[0]),
+                max(window[1], self.deferred_region[1]),
+                min(window[2], self.deferred_region[2]),
+                max(window[3], self.deferred_region[3]),
+            ]
+        self.deferred_region = window
+
+    def apply_deferred_deposits(self):
+        if self.deferred_region is None:
+            return
+        [start_x, end_x, start_y, end_y] = self.deferred_region
+        deposits = self.deferred_deposits[start_x:end_x, start_y:end_y]
+        gaussians = fftconvolve(deposits, self.gaussian_template_array, mode="full")
+        # remove rounding errors of FFT, so the field stays zero out of the gaussians
+        gaussians[np.abs(gaussians) <= 1e-12 * np.max(np.abs(gaussians))] = 0
+
+        # deferred deposits are shifted by the radius, gaussians start radius before them
+        radius = (self.gaussian_template_array.shape[0] - 1) // 2
+        start_x, start_y = start_x - 2 * radius, start_y - 2 * radius
+        field_start_x, field_start_y = max(start_x, 0), max(start_y, 0)
+        field_end_x = min(start_x + gaussians.shape[0], self.size)
+        field_end_y = min(start_y + gaussians.shape[1], self.size)
+        self._add_to_field_window(
+            field_start_x,
+            field_start_y,
+            gaussians[
+                field_start_x - start_x : field_end_x - start_x,
+                field_start_y - start_y : field_end_y - start_y,
+            ],
+        )
+        self._expand_active_region(
+            field_start_x, field_end_x, field_start_y, field_end_y
+        )
+
+        deposits[:, :] = 0
+        self.deferred_region = None
+
+    def _add_gaussians_to_grid_points(
+        self, grid_points_x: np.ndarray, grid_points_y: np.ndarray, amounts: np.ndarray
+    ):
+        radius = (self.gaussian_template_array.shape[0] - 1) // 2
+        offsets = np.arange(-radius, radius + 1)
+        shape = (grid_points_x.size,) + self.gaussian_template_array.shape
+        self._add_values_to_grid_points(
+            np.broadcast_to(
+                grid_points_x[:, np.newaxis, np.newaxis] + offsets[:, np.newaxis], shape
+            ).ravel(),
+            np.broadcast_to(
+                grid_points_y[:, np.newaxis, np.newaxis] + offsets, shape
+            ).ravel(),
+            (amounts[:, np.newaxis, np.newaxis] * self.gaussian_template_array).ravel(),
+        )
+
+    def add_pheromone_batch(
+        self,
+        start_positions: np.ndarray,
+        directions: np.ndarray,
+        amounts: np.ndarray,
+        release_type: PheromoneReleaseType,
+    ):
+        """
+        Releases pheromone on paths of many ants at once, float field only.
+        Same as add_pheromone_with_gaussian, add_pheromone_to_position
+        and add_pheromone_to_nearest_grid_point for every ant.
+        """
+        positions = get_positions_on_paths(start_positions, directions, self.settings)
+        number_of_positions = positions.shape[1]
+
+        if release_type == PheromoneReleaseType.GAUSSIAN_STAMP:
+            cells, stamps = self._get_gaussian_stamps(positions.reshape(-1, 2))
+            amounts_for_position = np.repeat(
+                amounts / number_of_positions, number_of_positions
+            )
+            offsets = np.arange(stamps.shape[1]) - self.gaussian_stamp_cache.radius
+            self._add_values_to_grid_points(
+                np.broadcast_to(
+                    cells[:, 0, np.newaxis, np.newaxis] + offsets[:, np.newaxis],
+                    stamps.shape,
+                ).ravel(),
+                np.broadcast_to(
+                    cells[:, 1, np.newaxis, np.newaxis] + offsets, stamps.shape
+                ).ravel(),
+                (amounts_for_position[:, np.newaxis, np.newaxis] * stamps).ravel(),
+            )
+            return
+
+        (
+            grid_points_x,
+            grid_points_y,
+            distances,
+            influence_rates,
+        ) = get_grid_points_for_positions(
+            positions.reshape(-1, 2), self.settings.NUMERICAL_STEP_SIZE
+        )
+
+        if release_type in [
+            PheromoneReleaseType.GAUSSIAN,
+            PheromoneReleaseType.GAUSSIAN_DEFERRED,
+        ]:
+            amounts_for_position = np.repeat(
+                amounts / number_of_positions, number_of_positions
+            )
+            add_gaussians = (
+                self._add_gaussians_to_grid_points
+                if release_type == PheromoneReleaseType.GAUSSIAN
+                else self._defer_gaussians_to_grid_points
+            )
+            add_gaussians(
+                grid_points_x.ravel(),
+                grid_points_y.ravel(),
+                (influence_rates * amounts_for_position[:, np.newaxis]).ravel(),
+            )
+            return
+
+        # number of positions in GridPointsForPath is doubled during its creation
+        amounts_for_position = np.repeat(
+            amounts / (2 * number_of_positions), number_of_positions
+        )
+        if release_type == PheromoneReleaseType.POSITION:
+            self._add_values_to_grid_points(
+                grid_points_x.ravel(),
+                grid_points_y.ravel(),
+                (influence_rates * amounts_for_position[:, np.newaxis]).ravel(),
+            )
+        elif release_type == PheromoneReleaseType.NEAREST_GRID_POINT:
+            nearest = np.argmin(distances, axis=1)
+            rows = np.arange(nearest.size)
+            self._add_values_to_grid_points(
+                grid_points_x[rows, nearest],
+                grid_points_y[rows, nearest],
+                amounts_for_position,
+            )
+        else:
+            raise NotImplementedError(
+                'Unknown pheromone release type "' + str(release_type) + '".'
+            )
+
+    def _get_gaussian_stamps(self, positions: np.ndarray):
+        if self.is_decimal:
+            raise NotImplementedError(
+                "Gaussian stamps are not available for Decimal pheromone field."
+            )
+        return self.gaussian_stamp_cache.get_stamps(positions)
+
+    def add_pheromone_with_gaussian_stamp(
+        self, start_position: list, direction: Decimal, amount_of_pheromone: Decimal
+    ):
+        positions = get_positions_on_paths(
+            np.array([start_position], dtype=np.float64),
+            np.array([direction], dtype=np.float64),
+            self.settings,
+        )[0]
+        amount_for_position = float(amount_of_pheromone) / len(positions)
+        cells, stamps = self._get_gaussian_stamps(positions)
+        radius = self.gaussian_stamp_cache.radius
+        size = self.gaussian_stamp_cache.size
+
+        for [cell_x, cell_y], stamp in zip(cells, stamps):
+            start_x, start_y = cell_x - radius, cell_y - radius
+            end_x, end_y = start_x + size, start_y + size
+            field_start_x, field_start_y = max(start_x, 0), max(start_y, 0)
+            field_end_x, field_end_y = min(end_x, self.size), min(end_y, self.size)
+            if field_start_x >= field_end_x or field_start_y >= field_end_y:
+                continue
+            self._add_to_field_window(
+                field_start_x,
+                field_start_y,
+                amount_for_position
+                * stamp[
+                    field_start_x - start_x : size - (end_x - field_end_x),
+                    field_start_y - start_y : size - (end_y - field_end_y),
+                ],
+            )
+            self._expand_active_region(
+                field_start_x, field_end_x, field_start_y, field_end_y
+            )
+
+    def add_pheromone_with_deferred_gaussian(
+        self, start_position: list, direction: Decimal, amount_of_pheromone: Decimal
+    ):
+        self.add_pheromone_batch(
+            np.array([start_position], dtype=np.float64),
+            np.array([direction], dtype=np.float64),
+            np.array([amount_of_pheromone], dtype=np.float64),
+            PheromoneReleaseType.GAUSSIAN_DEFERRED,
+        )
+
     def roll_current_field(self, direction=1, axis=0):
         new_matrix = np.roll(self.current_field, direction, axis=axis)
         if axis == 0:
             if direction == 1:
-                new_matrix[0, :] = Decimal("0")
+                new_matrix[0, :] = self._to_field_value(0)
             else:
-                new_matrix[-1, :] = Decimal("0")
+                new_matrix[-1, :] = self._to_field_value(0)
         else:
             if direction == 1:
-                new_matrix[:, 0] = Decimal("0")
+                new_matrix[:, 0] = self._to_field_value(0)
             else:
-                new_matrix[:, -1] = Decimal("0")
+                new_matrix[:, -1] = self._to_field_value(0)
         return new_matrix
 
     def get_next_diffusion_step(self):
@@ -157,8 +776,81 @@ class Pheromone:
             + self.roll_current_field(-1, 1)
         )
 
+    def _diffuse_in_place(self):
+        if self.is_tracking_active_region:
+            if self.active_region is None:
+                return
+            # pheromone spreads at most one grid point in every diffusion step
+            [start_x, end_x, start_y, end_y] = self.active_region
+            self._expand_active_region(start_x - 1, end_x + 1, start_y - 1, end_y + 1)
+            [start_x, end_x, start_y, end_y] = self.active_region
+        else:
+            [start_x, end_x, start_y, end_y] = [0, self.size, 0, self.size]
+
+        if self.field_dtype != np.float64 and self._accumulation_buffer is None:
+            self._accumulation_buffer = create_accumulation_buffer(self.size)
+        diffuse_window(
+            self._padded_fields[0],
+            self._padded_fields[1],
+            [start_x, end_x, start_y, end_y],
+            self.get_diffusion_coefficients(),
+            self._accumulation_buffer,
+        )
+
+        self._padded_fields.reverse()
+        self._inner_fields.reverse()
+        self.current_field = self._inner_fields[0]
+
+    def get_diffusion_coefficients(self):
+        return [self.multiplicator, self.center_multiplicator, self.neighbours_ratio]
+
     def diffuse(self):
-        self.current_field = self.get_next_diffusion_step()
+        self.apply_deferred_deposits()
+        if self.is_decimal:
+            self.current_field = self.get_next_diffusion_step()
+        elif self.tiled_field is not None:
+            self.tiled_field.diffuse(
+                self.multiplicator, self.center_multiplicator, self.neighbours_ratio
+            )
+        else:
+            self._diffuse_in_place()
+
+    # diffusion for the whole ant step
+    def diffuse_step(self):
+        self.apply_deferred_deposits()
+        if self.diffusion_solver is None:
+            for _ in range(self.settings.NUMBER_OF_DIFFUSIONS_IN_STEP):
+                self.diffuse()
+            if self.is_tracking_active_region:
+                self._shrink_active_region()
+            if self.tiled_field is not None:
+                self.tiled_field.remove_undetectable_tiles(
+                    self.minimum_detectable_pheromone
+                )
+        elif self.field_dtype == np.float64:
+            self.diffusion_solver.diffuse(self.current_field)
+        else:
+            # solvers work with float64 values
+            field = self.current_field.astype(np.float64)
+            self.diffusion_solver.diffuse(field)
+            self.current_field[:, :] = field
+
+    def save_field(self, path: str):
+        """
+        Saves the float field to .npy file (np.load), e.g. instead of step data.
+        Memory mapped buffers are flushed, so their files are up to date.
+        """
+        self.apply_deferred_deposits()
+        if self.tiled_field is not None:
+            np.save(path, self.tiled_field.to_array())
+            return
+        if self.fields_folder is not None:
+            for field in self._padded_fields:
+                field.flush()
+        np.save(path, self.current_field)
 
     def get_pheromone_str_data(self):
-        return np.round(np.array(self.current_field, dtype=float), 10).tolist()
+        self.apply_deferred_deposits()
+        if self.tiled_field is not None:
+            return self.tiled_field.get_rounded_rows(10)
+        return np.round(np.asarray(self.current_field, dtype=float), 10).tolist()
@@ -0,0 +1,171 @@
+import numpy as np
+
+from settings import Settings, PheromoneFieldType
+from .diffusion_solvers import SpectralDiffusionSolver
+from .grid_cells import get_grid_points_for_positions
+
+
+class PheromoneStack:
+    """
+    Float fields of several pheromones stored in one array (channel, x, y).
+    Pheromone objects keep working on views of their channel,
+    diffusion, sampling and snapshots handle all channels at once.
+    """
+
+    def __init__(self, settings: Settings, pheromones: list):
+        if settings.PHEROMONE_FIELD_TYPE != PheromoneFieldType.FLOAT64:
+            raise NotImplementedError(
+                "Stacked pheromones are available only for FLOAT64 pheromone field."
+            )
+        self.settings = settings
+        self.size = settings.NUMERICAL_ARRAY_SIZE
+        self.pheromones = pheromones
+
+        # two buffers with zero ghost border, diffusion writes into the second one
+        self._padded_fields = [
+            np.zeros((len(pheromones), self.size + 2, self.size + 2)),
+            np.zeros((len(pheromones), self.size + 2, self.size + 2)),
+        ]
+        for channel, pheromone in enumerate(pheromones):
+            self._padded_fields[0][channel, 1:-1, 1:-1] = pheromone.current_field
+        self._set_pheromone_fields()
+
+        # per channel coefficients, shape (channel, 1, 1)
+        self.multiplicators = self._get_coefficients("multiplicator")
+        self.center_multiplicators = self._get_coefficients("center_multiplicator")
+        self.neighbours_ratios = (
+            None
+            if any(pheromone.neighbours_ratio is None for pheromone in pheromones)
+            else self._get_coefficients("neighbours_ratio")
+        )
+
+    def _get_coefficients(self, name: str):
+        return np.array(
+            [getattr(pheromone, name) for pheromone in self.pheromones]
+        ).reshape(-1, 1, 1)
+
+    def _set_pheromone_fields(self):
+        for channel, pheromone in enumerate(self.pheromones):
+            pheromone.set_padded_fields(
+                [padded_field[channel] for padded_field in self._padded_fields]
+            )
+
+    @property
+    def current_fields(self):
+        return self._padded_fields[0][:, 1:-1, 1:-1]
+
+    def apply_deferred_deposits(self):
+        for pheromone in self.pheromones:
+            pheromone.apply_deferred_deposits()
+
+    def _get_diffusion_window(self):
+        if not any(
+            pheromone.is_tracking_active_region for pheromone in self.pheromones
+        ):
+            return [0, self.size, 0, self.size]
+
+        # pheromone spreads at most one grid point in every diffusion step
+        regions = []
+        for pheromone in self.pheromones:
+            if pheromone.active_region is None:
+                continue
+            [start_x, end_x, start_y, end_y] = pheromone.active_region
+            pheromone._expand_active_region(
+                start_x - 1, end_x + 1, start_y - 1, end_y + 1
+            )
+            regions.append(pheromone.active_region)
+        if len(regions) == 0:
+            return None
+        regions = np.array(regions)
+        return [
+            regions[:, 0].min(),
+            regions[:, 1].max(),
+            regions[:, 2].min(),
+            regions[:, 3].max(),
+        ]
+
+    def _diffuse_in_place(self):
+        """
+        One explicit diffusion step of all channels,
+        same operations as Pheromone._diffuse_in_place for every channel.
+        """
+        window = self._get_diffusion_window()
+        if window is None:
+            return
+        [start_x, end_x, start_y, end_y] = window
+
+        # padded field is shifted by one grid point
+        field = self._padded_fields[0]
+        columns = slice(start_y + 1, end_y + 1)
+        rows = slice(start_x + 1, end_x + 1)
+        next_field = self._padded_fields[1][:, rows, columns]
+
+        np.add(
+            field[:, start_x:end_x, columns],
+            field[:, start_x + 2 : end_x + 2, columns],
+            out=next_field,
+        )
+        next_field += field[:, rows, start_y:end_y]
+        next_field += field[:, rows, start_y + 2 : end_y + 2]
+        if self.neighbours_ratios is None:
+            for channel, pheromone in enumerate(self.pheromones):
+                if pheromone.neighbours_ratio is None:
+                    next_field[channel] *= pheromone.multiplicator
+                else:
+                    next_field[channel] *= pheromone.neighbours_ratio
+                    next_field[channel] += field[channel, rows, columns]
+                    next_field[channel] *= pheromone.center_multiplicator
+        else:
+            next_field *= self.neighbours_ratios
+            next_field += field[:, rows, columns]
+            next_field *= self.center_multiplicators
+
+        self._padded_fields.reverse()
+        self._set_pheromone_fields()
+
+    def diffuse(self):
+        self.apply_deferred_deposits()
+        self._diffuse_in_place()
+
+    # diffusion for the whole ant step
+    def diffuse_step(self):
+        self.apply_deferred_deposits()
+        solvers = [pheromone.diffusion_solver for pheromone in self.pheromones]
+        if all(solver is None for solver in solvers):
+            for _ in range(self.settings.NUMBER_OF_DIFFUSIONS_IN_STEP):
+                self._diffuse_in_place()
+            for pheromone in self.pheromones:
+                if pheromone.is_tracking_active_region:
+                    pheromone._shrink_active_region()
+        elif all(isinstance(solver, SpectralDiffusionSolver) for solver in solvers):
+            SpectralDiffusionSolver.diffuse_stacked(solvers, self.current_fields)
+        else:
+            for pheromone in self.pheromones:
+                pheromone.diffusion_solver.diffuse(pheromone.current_field)
+
+    def get_pheromone_values(self, positions: np.ndarray, channels: np.ndarray):
+        """
+        Values for many real positions (n, 2) at once, channels: channel of every
+        position, -1 for zero value. Values of all channels are read with one gather.
+        """
+        self.apply_deferred_deposits()
+        (
+            grid_points_x,
+            grid_points_y,
+            _,
+            influence_rates,
+        ) = get_grid_points_for_positions(positions, self.settings.NUMERICAL_STEP_SIZE)
+        # grid points outside of the field are read from the zero ghost border
+        values = self._padded_fields[0][
+            np.maximum(channels, 0)[:, np.newaxis],
+            np.clip(grid_points_x + 1, 0, self.size + 1),
+            np.clip(grid_points_y + 1, 0, self.size + 1),
+        ]
+        return np.where(channels >= 0, np.sum(influence_rates * values, axis=1), 0.0)
+
+    def get_pheromones_str_data(self):
+        """
+        Rounded fields of all channels (same values as Pheromone.get_pheromone_str_data).
+        """
+        self.apply_deferred_deposits()
+        return np.round(self.current_fields, 10).tolist()
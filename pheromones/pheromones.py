@@ -1,8 +1,18 @@
 from decimal import Decimal
 
-from settings import Settings
+import numpy as np
+
+from settings import (
+    Settings,
+    PheromoneReleaseType,
+    PheromoneFieldType,
+    PheromoneStorageType,
+)
 from .grid_points import GaussianTemplate
+from .gaussian_stamps import GaussianStampCache
 from .pheromone import Pheromone
+from .pheromone_stack import PheromoneStack
+from .domain_decomposition import DecomposedDiffusion
 
 
 class Pheromones:
@@ -13,6 +23,7 @@ class Pheromones:
         only_general_pheromone: bool = False,
         pheromone_a=None,
         pheromone_b=None,
+        fields_folder: str = None,
     ):
         self.settings = settings
         self.size = self.settings.NUMERICAL_ARRAY_SIZE
@@ -20,6 +31,7 @@ class Pheromones:
         self.only_general_pheromone = only_general_pheromone
 
         gaussian_template = GaussianTemplate(settings)
+        gaussian_stamp_cache = GaussianStampCache(gaussian_template, settings)
 
         if only_food_pheromone and not only_general_pheromone:
             self.pheromone_a = None
@@ -29,8 +41,11 @@ class Pheromones:
                 self.settings.PDE_DECAY_PARAMETER_A,
                 self.settings.DIFFUSION_CONSTANT_A,
                 current_field=pheromone_a,
+                fields_folder=fields_folder,
+                name="pheromone_a",
             )
             self.pheromone_a.set_gaussian_template(gaussian_template)
+            self.pheromone_a.set_gaussian_stamp_cache(gaussian_stamp_cache)
         if only_general_pheromone:
             self.pheromone_b = None
         else:
@@ -39,8 +54,42 @@ class Pheromones:
                 self.settings.PDE_DECAY_PARAMETER_B,
                 self.settings.DIFFUSION_CONSTANT_B,
                 current_field=pheromone_b,
+                fields_folder=fields_folder,
+                name="pheromone_b",
             )
             self.pheromone_b.set_gaussian_template(gaussian_template)
+            self.pheromone_b.set_gaussian_stamp_cache(gaussian_stamp_cache)
+
+        self.pheromone_stack = None
+        storage_type = self.settings.PHEROMONE_STORAGE_TYPE
+        self.is_memory_mapped = storage_type == PheromoneStorageType.MEMORY_MAPPED
+        if storage_type == PheromoneStorageType.STACKED:
+            # only FLOAT64 fields are stacked, other field types keep separate fields
+            if self.settings.PHEROMONE_FIELD_TYPE == PheromoneFieldType.FLOAT64:
+                self.pheromone_stack = PheromoneStack(
+                    self.settings, self.get_pheromones()
+                )
+        elif storage_type not in [
+            PheromoneStorageType.SEPARATE,
+            PheromoneStorageType.TILED,
+            PheromoneStorageType.MEMORY_MAPPED,
+        ]:
+            raise NotImplementedError(
+                'Unknown pheromone storage type "' + str(storage_type) + '".'
+            )
+
+        self.decomposed_diffusion = None
+        if self.settings.DIFFUSION_PROCESSES > 1:
+            self.decomposed_diffusion = DecomposedDiffusion(
+                self.settings, self.get_pheromones()
+            )
+
+    def get_pheromones(self):
+        return [
+            pheromone
+            for pheromone in [self.pheromone_a, self.pheromone_b]
+            if pheromone is not None
+        ]
 
     def get_released_pheromone(self, looking_for_food: bool):
         if self.only_general_pheromone:
@@ -70,6 +119,47 @@ class Pheromones:
         else:
             return Decimal(0)
 
+    def get_watched_pheromone_values(self, positions: list, looking_for_food: list):
+        """
+        Values of watched pheromones for many positions [x, y] at once,
+        e.g. left and right antennae of all ants.
+        """
+        is_decimal = self.settings.PHEROMONE_FIELD_TYPE == PheromoneFieldType.DECIMAL
+        positions = np.array(
+            positions, dtype=object if is_decimal else np.float64
+        ).reshape(-1, 2)
+        looking_for_food = np.array(looking_for_food, dtype=bool)
+        if self.pheromone_stack:
+            return self._get_stacked_watched_pheromone_values(
+                positions, looking_for_food
+            )
+        values = (
+            np.full(len(positions), Decimal(0), dtype=object)
+            if is_decimal
+            else np.zeros(len(positions), dtype=np.float64)
+        )
+
+        for is_looking_for_food in [True, False]:
+            pheromone = self.get_watched_pheromone(is_looking_for_food)
+            mask = looking_for_food == is_looking_for_food
+            if pheromone and np.any(mask):
+                values[mask] = pheromone.get_pheromone_values(positions[mask])
+        return values
+
+    def _get_stacked_watched_pheromone_values(
+        self, positions: np.ndarray, looking_for_food: np.ndarray
+    ):
+        # channel of watched pheromone for every position, -1 if there is none
+        pheromones = self.get_pheromones()
+        channels = np.full(len(positions), -1)
+        for is_looking_for_food in [True, False]:
+            pheromone = self.get_watched_pheromone(is_looking_for_food)
+            if pheromone:
+                channels[looking_for_food == is_looking_for_food] = pheromones.index(
+                    pheromone
+                )
+        return self.pheromone_stack.get_pheromone_values(positions, channels)
+
     def add_pheromone_to_nearest_grid_point(
         self,
         start_position: list,
@@ -114,14 +204,164 @@ class Pheromones:
         if pheromone:
             pheromone.add_pheromone_with_gaussian(start_position, direction, amount)
 
+    def add_pheromone(
+        self,
+        release_type: PheromoneReleaseType,
+        start_position: list,
+        direction: Decimal,
+        looking_for_food: bool,
+        amount: Decimal,
+    ):
+        if release_type == PheromoneReleaseType.GAUSSIAN:
+            self.add_pheromone_to_road(
+                start_position, direction, looking_for_food, amount=amount
+            )
+        elif release_type == PheromoneReleaseType.GAUSSIAN_STAMP:
+            self.add_pheromone_with_gaussian_stamp(
+                start_position, direction, looking_for_food, amount=amount
+            )
+        elif release_type == PheromoneReleaseType.GAUSSIAN_DEFERRED:
+            self.add_pheromone_with_deferred_gaussian(
+                start_position, direction, looking_for_food, amount=amount
+            )
+        elif release_type == PheromoneReleaseType.POSITION:
+            self.add_pheromone_to_position(
+                start_position, direction, looking_for_food, amount=amount
+            )
+        elif release_type == PheromoneReleaseType.NEAREST_GRID_POINT:
+            self.add_pheromone_to_nearest_grid_point(
+                start_position, direction, looking_for_food, amount=amount
+            )
+        else:
+            raise NotImplementedError(
+                'Unknown pheromone release type "' + str(release_type) + '".'
+            )
+
+    def deposit_batch(
+        self,
+        positions: list,
+        directions: list,
+        amounts: list,
+        looking_for_food: list,
+    ):
+        """
+        Releases pheromone of many ants at once (PHEROMONE_RELEASE_TYPE).
+        positions: start positions [x, y] of paths
+        directions: direction of paths, None if the ant did not move
+        """
+        release_type = self.settings.PHEROMONE_RELEASE_TYPE
+        if self.settings.PHEROMONE_FIELD_TYPE == PheromoneFieldType.DECIMAL:
+            # reference mode, ant by ant
+            for position, direction, is_looking_for_food, amount in zip(
+                positions, directions, looking_for_food, amounts
+            ):
+                self.add_pheromone(
+                    release_type, position, direction, is_looking_for_food, amount
+                )
+            return
+
+        positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        directions = np.array(directions, dtype=np.float64)
+        amounts = np.array(amounts, dtype=np.float64)
+        looking_for_food = np.array(looking_for_food, dtype=bool)
+        # pheromone is released only on paths (None values are converted to nan)
+        is_released = ~(np.isnan(directions) | np.isnan(positions).any(axis=1))
+
+        for is_looking_for_food in [True, False]:
+            pheromone = self.get_released_pheromone(is_looking_for_food)
+            mask = is_released & (looking_for_food == is_looking_for_food)
+            if pheromone and np.any(mask):
+                pheromone.add_pheromone_batch(
+                    positions[mask], directions[mask], amounts[mask], release_type
+                )
+
+    def add_pheromone_with_gaussian_stamp(
+        self,
+        start_position: list,
+        direction: Decimal,
+        looking_for_food: bool,
+        amount: Decimal,
+    ):
+        if None in start_position or direction is None:
+            return
+
+        pheromone = self.get_released_pheromone(looking_for_food)
+        if pheromone:
+            pheromone.add_pheromone_with_gaussian_stamp(
+                start_position, direction, amount
+            )
+
+    def add_pheromone_with_deferred_gaussian(
+        self,
+        start_position: list,
+        direction: Decimal,
+        looking_for_food: bool,
+        amount: Decimal,
+    ):
+        if None in start_position or direction is None:
+            return
+
+        pheromone = self.get_released_pheromone(looking_for_food)
+        if pheromone:
+            pheromone.add_pheromone_with_deferred_gaussian(
+                start_position, direction, amount
+            )
+
     def diffuse(self):
+        if self.decomposed_diffusion:
+            self.decomposed_diffusion.diffuse()
+            return
+        if self.pheromone_stack:
+            self.pheromone_stack.diffuse()
+            return
         if self.pheromone_a:
             self.pheromone_a.diffuse()
         if self.pheromone_b:
             self.pheromone_b.diffuse()
 
+    def diffuse_step(self):
+        if self.decomposed_diffusion:
+            self.decomposed_diffusion.diffuse_step()
+            return
+        if self.pheromone_stack:
+            self.pheromone_stack.diffuse_step()
+            return
+        if self.pheromone_a:
+            self.pheromone_a.diffuse_step()
+        if self.pheromone_b:
+            self.pheromone_b.diffuse_step()
+
+    def close(self):
+        if self.decomposed_diffusion:
+            self.decomposed_diffusion.close()
+
+    def save_pheromone_fields(self, folder: str, file_prefix: str):
+        """
+        Saves fields to .npy files ({file_prefix}_pheromone_a.npy, ...),
+        returns names of the files for step data.
+        """
+        data = {}
+        for key, pheromone in [
+            ["pheromone_a", self.pheromone_a],
+            ["pheromone_b", self.pheromone_b],
+        ]:
+            if pheromone:
+                file_name = f"{file_prefix}_{key}.npy"
+                pheromone.save_field(f"{folder}/{file_name}")
+                data[key + "_file"] = file_name
+        return data
+
     def get_pheromones_str_data(self):
         data = {}
+        if self.pheromone_stack:
+            fields_data = self.pheromone_stack.get_pheromones_str_data()
+            for key, pheromone in [
+                ["pheromone_a", self.pheromone_a],
+                ["pheromone_b", self.pheromone_b],
+            ]:
+                if pheromone:
+                    data[key] = fields_data[self.get_pheromones().index(pheromone)]
+            return data
         if self.pheromone_a:
             data["pheromone_a"] = self.pheromone_a.get_pheromone_str_data()
         if self.pheromone_b:
@@ -0,0 +1,286 @@
+import numpy as np
+
+# number of tiles diffused at once, bounds the float64 working arrays of diffuse
+DIFFUSION_BATCH_TILES = 64
+
+
+class TiledField:
+    """
+    Float field (size x size) stored in square tiles, only tiles which received
+    pheromone are allocated, values outside of allocated tiles are zero.
+    Tiles are slots of one array, free slots are reused.
+    Tiles may be stored in float32, values are always computed in float64.
+    """
+
+    def __init__(self, size: int, tile_size: int, dtype=np.float64):
+        self.size = size
+        self.tile_size = tile_size
+        self.number_of_tiles = -(-size // tile_size)
+        # slot of the tile for every tile position, -1 if the tile is not allocated
+        self.tile_slots = np.full(
+            (self.number_of_tiles, self.number_of_tiles), -1, dtype=np.int64
+        )
+        self.tiles = np.zeros((0, tile_size, tile_size), dtype=dtype)
+        self.free_slots = []
+        # grid points of the last tiles outside of the field are kept zero
+        self.last_tile_size = size - (self.number_of_tiles - 1) * tile_size
+
+    def get_number_of_allocated_tiles(self):
+        return int(np.count_nonzero(self.tile_slots >= 0))
+
+    def _get_free_slots(self, number: int):
+        if len(self.free_slots) < number:
+            capacity = len(self.tiles)
+            new_capacity = max(2 * capacity, capacity + number - len(self.free_slots))
+            tiles = np.zeros(
+                (new_capacity, self.tile_size, self.tile_size), dtype=self.tiles.dtype
+            )
+            tiles[:capacity] = self.tiles
+            self.tiles = tiles
+            self.free_slots.extend(range(new_capacity - 1, capacity - 1, -1))
+        slots = self.free_slots[len(self.free_slots) - number :]
+        del self.free_slots[len(self.free_slots) - number :]
+        return slots
+
+    def _allocate_tiles(self, tiles_x: np.ndarray, tiles_y: np.ndarray):
+        """Allocates missing tiles (arrays of tile positions), returns their slots."""
+        is_missing = self.tile_slots[tiles_x, tiles_y] < 0
+        if np.any(is_missing):
+            missing_tiles = np.unique(
+                tiles_x[is_missing] * self.number_of_tiles + tiles_y[is_missing]
+            )
+            self.tile_slots[
+                missing_tiles // self.number_of_tiles,
+                missing_tiles % self.number_of_tiles,
+            ] = self._get_free_slots(missing_tiles.size)
+        return self.tile_slots[tiles_x, tiles_y]
+
+    def _get_allocated_tiles(self):
+        tiles_x, tiles_y = np.nonzero(self.tile_slots >= 0)
+        return tiles_x, tiles_y, self.tile_slots[tiles_x, tiles_y]
+
+    def _is_inside(self, grid_points_x: np.ndarray, grid_points_y: np.ndarray):
+        return (
+            (grid_points_x >= 0)
+            & (grid_points_x < self.size)
+            & (grid_points_y >= 0)
+            & (grid_points_y < self.size)
+        )
+
+    def add_values(
+        self, grid_points_x: np.ndarray, grid_points_y: np.ndarray, values: np.ndarray
+    ):
+        """
+        Adds values to grid points (1D arrays), values of the same grid point
+        are summed first (as in add_values_to_grid_points).
+        Grid points outside of the field are skipped.
+        Returns changed window [start_x, end_x, start_y, end_y] or None.
+        """
+        is_inside = self._is_inside(grid_points_x, grid_points_y)
+        if not np.any(is_inside):
+            return None
+        grid_points_x = grid_points_x[is_inside]
+        grid_points_y = grid_points_y[is_inside]
+
+        slots = self._allocate_tiles(
+            grid_points_x // self.tile_size, grid_points_y // self.tile_size
+        )
+        indices = (
+            slots * self.tile_size + grid_points_x % self.tile_size
+        ) * self.tile_size + grid_points_y % self.tile_size
+        unique_indices, inverse = np.unique(indices, return_inverse=True)
+        self.tiles.reshape(-1)[unique_indices] += np.bincount(
+            inverse.ravel(), weights=values[is_inside]
+        )
+        return [
+            int(grid_points_x.min()),
+            int(grid_points_x.max()) + 1,
+            int(grid_points_y.min()),
+            int(grid_points_y.max()) + 1,
+        ]
+
+    def add_window(self, start_x: int, start_y: int, values: np.ndarray):
+        """
+        Adds values (2D array) to the window of the field starting at the grid point,
+        the window must be inside of the field. Tiles are not allocated for zeros.
+        """
+        end_x, end_y = start_x + values.shape[0], start_y + values.shape[1]
+        for tile_x in range(start_x // self.tile_size, -(-end_x // self.tile_size)):
+            tile_start_x = tile_x * self.tile_size
+            window_start_x = max(start_x, tile_start_x)
+            window_end_x = min(end_x, tile_start_x + self.tile_size)
+            for tile_y in range(start_y // self.tile_size, -(-end_y // self.tile_size)):
+                tile_start_y = tile_y * self.tile_size
+                window_start_y = max(start_y, tile_start_y)
+                window_end_y = min(end_y, tile_start_y + self.tile_size)
+                window_values = values[
+                    window_start_x - start_x : window_end_x - start_x,
+                    window_start_y - start_y : window_end_y - start_y,
+                ]
+                if not np.any(window_values):
+                    continue
+                slot = self._allocate_tiles(np.array([tile_x]), np.array([tile_y]))[0]
+                self.tiles[
+                    slot,
+                    window_start_x - tile_start_x : window_end_x - tile_start_x,
+                    window_start_y - tile_start_y : window_end_y - tile_start_y,
+                ] += window_values
+
+    def get_values(self, grid_points_x: np.ndarray, grid_points_y: np.ndarray):
+        """Values of grid points (arrays of any shape), zero outside of the field."""
+        values = np.zeros(grid_points_x.shape, dtype=np.float64)
+        slots = np.full(grid_points_x.shape, -1, dtype=np.int64)
+        is_inside = self._is_inside(grid_points_x, grid_points_y)
+        slots[is_inside] = self.tile_slots[
+            grid_points_x[is_inside] // self.tile_size,
+            grid_points_y[is_inside] // self.tile_size,
+        ]
+        is_stored = slots >= 0
+        values[is_stored] = self.tiles[
+            slots[is_stored],
+            grid_points_x[is_stored] % self.tile_size,
+            grid_points_y[is_stored] % self.tile_size,
+        ]
+        return values
+
+    def _allocate_border_tiles(self):
+        # pheromone spreads at most one grid point in every diffusion step,
+        # so it reaches only neighbouring tiles with non zero values on the edge
+        tiles_x, tiles_y, slots = self._get_allocated_tiles()
+        last_tile = self.number_of_tiles - 1
+        for edges, shift_x, shift_y, is_inside in [
+            (self.tiles[slots, 0, :], -1, 0, tiles_x > 0),
+            (self.tiles[slots, -1, :], 1, 0, tiles_x < last_tile),
+            (self.tiles[slots, :, 0], 0, -1, tiles_y > 0),
+            (self.tiles[slots, :, -1], 0, 1, tiles_y < last_tile),
+        ]:
+            is_spreading = is_inside & np.any(edges != 0, axis=1)
+            if np.any(is_spreading):
+                self._allocate_tiles(
+                    tiles_x[is_spreading] + shift_x, tiles_y[is_spreading] + shift_y
+                )
+
+    def _get_neighbour_slots(self, tiles_x: np.ndarray, tiles_y: np.ndarray):
+        # tile slots are padded by missing tiles on every side
+        padded_slots = np.pad(self.tile_slots, 1, constant_values=-1)
+        return [
+            padded_slots[tiles_x, tiles_y + 1],
+            padded_slots[tiles_x + 2, tiles_y + 1],
+            padded_slots[tiles_x + 1, tiles_y],
+            padded_slots[tiles_x + 1, tiles_y + 2],
+        ]
+
+    def diffuse(
+        self, multiplicator: float, center_multiplicator: float, neighbours_ratio
+    ):
+        """
+        One explicit diffusion step, same operations as Pheromone._diffuse_in_place.
+        Values are exchanged across tile borders by ghost borders of tiles, taken
+        from a copy of tile edges made before the step. Tiles are diffused in
+        batches of DIFFUSION_BATCH_TILES tiles.
+        """
+        self._allocate_border_tiles()
+        tiles_x, tiles_y, slots = self._get_allocated_tiles()
+        if slots.size == 0:
+            return
+
+        # edges of all slots before the step: first row, last row, first column,
+        # last column
+        edges = [
+            np.array(self.tiles[:, 0, :], dtype=np.float64),
+            np.array(self.tiles[:, -1, :], dtype=np.float64),
+            np.array(self.tiles[:, :, 0], dtype=np.float64),
+            np.array(self.tiles[:, :, -1], dtype=np.float64),
+        ]
+        neighbour_slots = self._get_neighbour_slots(tiles_x, tiles_y)
+        for start in range(0, slots.size, DIFFUSION_BATCH_TILES):
+            batch = slice(start, start + DIFFUSION_BATCH_TILES)
+            self._diffuse_tiles(
+                tiles_x[batch],
+                tiles_y[batch],
+                slots[batch],
+                [neighbours[batch] for neighbours in neighbour_slots],
+                edges,
+                multiplicator,
+                center_multiplicator,
+                neighbours_ratio,
+            )
+
+    def _diffuse_tiles(
+        self,
+        tiles_x: np.ndarray,
+        tiles_y: np.ndarray,
+        slots: np.ndarray,
+        neighbour_slots: list,
+        edges: list,
+        multiplicator: float,
+        center_multiplicator: float,
+        neighbours_ratio,
+    ):
+        size = self.tile_size
+        [first_rows, last_rows, first_columns, last_columns] = edges
+        [upper, lower, left, right] = neighbour_slots
+        field = np.zeros((slots.size, size + 2, size + 2), dtype=np.float64)
+        field[:, 1:-1, 1:-1] = self.tiles[slots]
+        field[upper >= 0, 0, 1:-1] = last_rows[upper[upper >= 0]]
+        field[lower >= 0, -1, 1:-1] = first_rows[lower[lower >= 0]]
+        field[left >= 0, 1:-1, 0] = last_columns[left[left >= 0]]
+        field[right >= 0, 1:-1, -1] = first_columns[right[right >= 0]]
+
+        next_field = np.add(field[:, :size, 1:-1], field[:, 2:, 1:-1])
+        next_field += field[:, 1:-1, :size]
+        next_field += field[:, 1:-1, 2:]
+        if neighbours_ratio is None:
+            next_field *= multiplicator
+        else:
+            next_field *= neighbours_ratio
+            next_field += field[:, 1:-1, 1:-1]
+            next_field *= center_multiplicator
+
+        last_tile = self.number_of_tiles - 1
+        next_field[tiles_x == last_tile, self.last_tile_size :, :] = 0
+        next_field[tiles_y == last_tile, :, self.last_tile_size :] = 0
+        self.tiles[slots] = next_field
+
+    def remove_undetectable_tiles(self, minimum_detectable_value: float):
+        """Frees tiles without any detectable value, their values are removed."""
+        tiles_x, tiles_y, slots = self._get_allocated_tiles()
+        maximum_values = np.abs(self.tiles[slots]).max(axis=(1, 2), initial=0)
+        is_removed = (maximum_values < minimum_detectable_value) | (maximum_values == 0)
+        removed_slots = slots[is_removed]
+        self.tiles[removed_slots] = 0
+        self.tile_slots[tiles_x[is_removed], tiles_y[is_removed]] = -1
+        self.free_slots.extend(removed_slots.tolist())
+
+    def get_rounded_rows(self, decimals: int):
+        """
+        Rows of the field (lists) rounded to decimals, same as
+        np.round(field, decimals).tolist(), built by strips of tiles.
+        """
+        rows = []
+        for tile_x in range(self.number_of_tiles):
+            start_x = tile_x * self.tile_size
+            strip = np.zeros(
+                (min(self.tile_size, self.size - start_x), self.size), dtype=np.float64
+            )
+            for tile_y in np.flatnonzero(self.tile_slots[tile_x] >= 0):
+                start_y = tile_y * self.tile_size
+                end_y = min(start_y + self.tile_size, self.size)
+                strip[:, start_y:end_y] = self.tiles[
+                    self.tile_slots[tile_x, tile_y],
+                    : strip.shape[0],
+                    : end_y - start_y,
+                ]
+            rows.extend(np.round(strip, decimals).tolist())
+        return rows
+
+    def to_array(self):
+        field = np.zeros((self.size, self.size), dtype=np.float64)
+        tiles_x, tiles_y, slots = self._get_allocated_tiles()
+        for tile_x, tile_y, slot in zip(tiles_x, tiles_y, slots):
+            start_x, start_y = tile_x * self.tile_size, tile_y * self.tile_size
+            window = field[
+                start_x : start_x + self.tile_size, start_y : start_y + self.tile_size
+            ]
+            window[:, :] = self.tiles[slot, : window.shape[0], : window.shape[1]]
+        return field
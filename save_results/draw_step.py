@@ -188,6 +188,13 @@ def draw_step(simulation_folder, drawing_folder_name, step, settings):
     with open(f"{simulation_folder}/data/{step:05d}.txt", "r") as file:
         data = json.loads(file.read())
 
+    # fields of memory mapped pheromones are saved in .npy files
+    for key in ["pheromone_a", "pheromone_b"]:
+        if key + "_file" in data:
+            data[key] = np.load(
+                f"{simulation_folder}/data/{data[key + '_file']}"
+            ).tolist()
+
     draw_pheromones(
         draw,
         settings.ZOOM,
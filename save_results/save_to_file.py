@@ -2,6 +2,7 @@ import json
 import os
 from datetime import datetime
 
+from helper_functions import try_make_dir
 from settings import Settings
 
 
@@ -17,6 +18,11 @@ class ResultsManager:
         os.mkdir(f"{self.results_folder}/results/{self.folder_name}")
         os.mkdir(f"{self.results_folder}/results/{self.folder_name}/data")
 
+    def get_pheromone_fields_folder(self):
+        folder = f"{self.results_folder}/results/{self.folder_name}/pheromones"
+        try_make_dir(folder)
+        return folder
+
     def save_settings(self, settings: Settings):
         with open(
             f"{self.results_folder}/results/{self.folder_name}/settings.py", "w"
@@ -30,6 +36,12 @@ class ResultsManager:
         ) as file:
             file.write(str(random_variable_values))
 
+    def save_random_seed(self, random_seed: int):
+        with open(
+            f"{self.results_folder}/results/{self.folder_name}/random_seed.py", "w"
+        ) as file:
+            file.write(str(random_seed))
+
     def save_step_results_file(self, step: int, results: dict):
         with open(
             f"{self.results_folder}/results/{self.folder_name}/data/{step:05d}.txt", "w"
@@ -40,15 +52,24 @@ class ResultsManager:
         summary = {
             "step": step,
             "ants": ants_data,
-            "foods": simulation.foods.get_food_data(),
+            # inactive foods are not drawn
+            "foods": simulation.foods.get_food_data(only_active=True),
             "nest": simulation.nest.get_nest_data(),
         }
         if (simulation.current_step % self.save_pheromones_every_nth_step) == 0:
-            summary.update(simulation.pheromones.get_pheromones_str_data())
+            summary.update(self.get_pheromones_data(step, simulation.pheromones))
         simulation.threads_management.add_and_start(
             target=self.save_step_results_file, args=(step, summary)
         )
 
+    def get_pheromones_data(self, step: int, pheromones):
+        if pheromones.is_memory_mapped:
+            # fields are saved to .npy files, step data contains names of the files
+            return pheromones.save_pheromone_fields(
+                f"{self.results_folder}/results/{self.folder_name}/data", f"{step:05d}"
+            )
+        return pheromones.get_pheromones_str_data()
+
     def save_final_results(self, results: dict):
         with open(
             f"{self.results_folder}/results/{self.folder_name}/data/results.txt", "w"
@@ -23,8 +23,6 @@ if __name__ == "__main__":
         max_processes=5,  # number of simulations running in parallel
     )
 
-    simulation_group.generate_random_variable_values()
-
     # Add simulations with different settings
     simulation_group.add_simulation(
         props={"ANTS_NUMBER": 200, "AVAILABLE_ANTS": 100},
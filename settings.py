@@ -7,6 +7,64 @@ class PheromoneReleaseType:
     GAUSSIAN = "GAUSSIAN"
     POSITION = "POSITION"
     NEAREST_GRID_POINT = "NEAREST_GRID_POINT"
+    # GAUSSIAN with cached stamps for quantized positions (float fields only)
+    GAUSSIAN_STAMP = "GAUSSIAN_STAMP"
+    # GAUSSIAN with all deposits of the step added by one convolution (float fields only)
+    GAUSSIAN_DEFERRED = "GAUSSIAN_DEFERRED"
+
+
+class AntsEngineType:
+    # every ant is an object (AntBaseClass), Decimal values
+    OBJECTS = "OBJECTS"
+    # ants are stored in arrays and moved at once, float values
+    ARRAYS = "ARRAYS"
+
+
+class TrajectoryHistoryType:
+    # positions of ants are not stored
+    DISABLED = "DISABLED"
+    # last TRAJECTORY_HISTORY_LENGTH positions of every ant
+    RING_BUFFER = "RING_BUFFER"
+    # all positions of every ant, preallocated for the number of steps of the run
+    PREALLOCATED = "PREALLOCATED"
+
+
+class PheromoneFieldType:
+    # reference mode, every grid value is a Python Decimal (slow)
+    DECIMAL = "DECIMAL"
+    FLOAT64 = "FLOAT64"
+    # fields stored in float32, deposits and diffusion sums accumulated in float64
+    FLOAT32 = "FLOAT32"
+
+
+class PheromoneStorageType:
+    # every pheromone has its own field
+    SEPARATE = "SEPARATE"
+    # fields of all pheromones in one array (pheromone, x, y), FLOAT64 fields only,
+    # DECIMAL and FLOAT32 fields are stored separately
+    STACKED = "STACKED"
+    # only tiles containing pheromone are allocated (float fields, explicit diffusion)
+    TILED = "TILED"
+    # fields and diffusion buffers are numpy.memmap .npy files (float fields only),
+    # saved fields are .npy files instead of values in step data
+    MEMORY_MAPPED = "MEMORY_MAPPED"
+
+
+class DiffusionSolverType:
+    # NUMBER_OF_DIFFUSIONS_IN_STEP explicit steps, limited by stability condition
+    EXPLICIT = "EXPLICIT"
+    # alternating direction implicit, one solve per ant step (float fields only)
+    ADI = "ADI"
+    # exact diffusion with decay in Fourier space, one FFT per ant step (float fields only)
+    SPECTRAL = "SPECTRAL"
+
+
+class SpectralBoundaryType:
+    # zero values outside of the field, same as the explicit scheme (sine transform)
+    ABSORBING = "ABSORBING"
+    # padded FFT, pheromone leaving the field is dropped once per ant step
+    ZERO_PADDING = "ZERO_PADDING"
+    PERIODIC = "PERIODIC"
 
 
 class Settings:
@@ -31,6 +89,12 @@ class Settings:
         # ratio of recruiting ants at the beginning, from interval [0.00, 1.00], max two decimal places
         self.RECRUITMENT_RATIO = 1.0
         self.MAX_RECRUITED_ANTS_AT_ONCE = 6
+        self.ANTS_ENGINE_TYPE = AntsEngineType.OBJECTS
+        # history of ant positions, saved as "trajectory" of every ant in final results
+        self.TRAJECTORY_HISTORY_TYPE = TrajectoryHistoryType.DISABLED
+        self.TRAJECTORY_HISTORY_LENGTH = 1000
+        # number of angles in the sin/cos table used by float ants, None - exact values
+        self.TRIG_TABLE_SIZE = None
         self.TIME_OF_FOOD_EXAMINATION = 30  # steps => x/2 seconds
         # originally 0.5
         self.NUMERICAL_STEP_SIZE = Decimal("1")  # grid size in mm
@@ -71,7 +135,25 @@ class Settings:
         self.NUMBER_OF_DIFFUSIONS_IN_STEP = int(
             self.STEP_LENGTH / self.VELOCITY / self.DIFFUSION_DELTA_T
         )
+        self.DIFFUSION_SOLVER_TYPE = DiffusionSolverType.EXPLICIT
+        # explicit float diffusion only in the window containing detectable pheromone,
+        # values below MINIMUM_DETECTABLE_PHEROMONE outside of the window are removed
+        self.DIFFUSION_ACTIVE_REGION = False
+        self.SPECTRAL_DIFFUSION_BOUNDARY = SpectralBoundaryType.ABSORBING
+        # explicit float diffusion split into strips of rows diffused by worker
+        # processes (fields in shared memory), 1 - diffusion in the main process
+        self.DIFFUSION_PROCESSES = 1
         self.PHEROMONE_RELEASE_TYPE = PheromoneReleaseType.GAUSSIAN
+        # GAUSSIAN_STAMP: positions per grid step, maximum number of cached stamps
+        self.GAUSSIAN_STAMP_RESOLUTION = 16
+        self.GAUSSIAN_STAMP_CACHE_SIZE = 1024
+        # numeric type of pheromone fields, DECIMAL - reference results (earlier default)
+        self.PHEROMONE_FIELD_TYPE = PheromoneFieldType.FLOAT64
+        # layout of fields of both pheromones
+        self.PHEROMONE_STORAGE_TYPE = PheromoneStorageType.SEPARATE
+        # TILED: grid points in one side of a tile, tiles without detectable
+        # pheromone (MINIMUM_DETECTABLE_PHEROMONE) are removed after every ant step
+        self.PHEROMONE_TILE_SIZE = 64
 
         # position: x, y, radius
         self.NEST_POSITION = [150, 150, 20]
@@ -1,11 +1,17 @@
 from save_results.draw_step import draw_step
 from environment import FoodSources, Nest
 from save_results import ResultsManager
-from settings import Settings
+from settings import Settings, AntsEngineType, PheromoneStorageType
 from .threads_management import ThreadsManagement
 from .time_measurement import TimeMeasurement
 import numpy as np
-from ants import AntsWithPheromones, AntsWithOrientation
+from ants import (
+    AntsWithPheromones,
+    AntsWithOrientation,
+    AntColonyWithPheromones,
+    AntColonyWithOrientation,
+    AntRandomStreams,
+)
 from pheromones import Pheromones
 from datetime import datetime
 from helper_functions import try_make_dir
@@ -23,6 +29,7 @@ class Simulation:
         number_of_steps: int = 10,
         settings: dict = None,
         random_variable_values: list = None,
+        random_seed: int = None,
         results_folder: str = None,
         simulation_folder_name: str = None,
         simulation_name: str = None,
@@ -42,32 +49,68 @@ class Simulation:
             save_pheromones_every_nth_step=save_pheromones_every_nth_step,
         )
 
+        # random values are taken from random_variable_values if they are given,
+        # otherwise from counter-based streams (random_seed)
         self.random_variable_values = random_variable_values
+        self.random_seed = random_seed
+        self.random_streams = None
         if self.random_variable_values is None:
-            self.random_variable_values = np.random.normal(
-                0, 1, self.settings.ANTS_NUMBER * number_of_steps
-            ).tolist()
+            if self.random_seed is None:
+                self.random_seed = int(np.random.randint(0, 2**63 - 1))
+            self.random_streams = AntRandomStreams(self.random_seed)
+
+        if self.settings.ANTS_ENGINE_TYPE == AntsEngineType.OBJECTS:
+            ants_classes = [AntsWithOrientation, AntsWithPheromones]
+        elif self.settings.ANTS_ENGINE_TYPE == AntsEngineType.ARRAYS:
+            ants_classes = [AntColonyWithOrientation, AntColonyWithPheromones]
+        else:
+            raise NotImplementedError(
+                'Unknown ants engine type "'
+                + str(self.settings.ANTS_ENGINE_TYPE)
+                + '".'
+            )
 
         if ant_orientation_type == AntOrientationType.ONE_PHEROMONE_WITH_ORIENTATION:
-            self.ants = AntsWithOrientation(self.settings, self.random_variable_values)
+            self.ants = ants_classes[0](
+                self.settings,
+                self.random_variable_values,
+                random_streams=self.random_streams,
+                number_of_steps=number_of_steps,
+            )
         else:
-            self.ants = AntsWithPheromones(self.settings, self.random_variable_values)
+            self.ants = ants_classes[1](
+                self.settings,
+                self.random_variable_values,
+                random_streams=self.random_streams,
+                number_of_steps=number_of_steps,
+            )
 
         self.foods = FoodSources(self.settings)
 
         self.nest = Nest(self.settings)
 
+        self.results_manager.create_directories()
         self.pheromones = Pheromones(
             self.settings,
             only_food_pheromone=ant_orientation_type
             == AntOrientationType.ONE_PHEROMONE_WITH_ORIENTATION,
             only_general_pheromone=ant_orientation_type
             == AntOrientationType.ONE_PHEROMONE,
+            fields_folder=(
+                self.results_manager.get_pheromone_fields_folder()
+                if self.settings.PHEROMONE_STORAGE_TYPE
+                == PheromoneStorageType.MEMORY_MAPPED
+                else None
+            ),
         )
 
-        self.results_manager.create_directories()
         self.results_manager.save_settings(self.settings)
-        self.results_manager.save_random_variable_values(self.random_variable_values)
+        if self.random_streams is None:
+            self.results_manager.save_random_variable_values(
+                self.random_variable_values
+            )
+        else:
+            self.results_manager.save_random_seed(self.random_seed)
 
     def get_results(self):
         summary = {
@@ -75,11 +118,29 @@ class Simulation:
             "simulation_name": self.simulation_name,
             "ants": self.ants.get_ants_final_results(),
             "ants_stats": self.ants.get_ants_stats(),
+            "ant_events": self.ants.get_ant_events_data(),
             "foods": self.foods.get_food_data(),
             "nest": self.nest.get_nest_data(),
         }
         return summary
 
+    def run_step(self):
+        """Computes the current step, returns data of ants."""
+        self.foods.update_active_foods(self.current_step)
+        ants_results = self.time_measurement.run_function(
+            self.ants.move_all,
+            self.current_step,
+            self.pheromones,
+            self.foods,
+            self.nest,
+        )
+        self.time_measurement.run_function(self.ants.spread_pheromones, self.pheromones)
+
+        self.time_measurement.run_function(self.pheromones.diffuse_step)
+
+        self.nest.add_food_supplies()
+        return ants_results
+
     def run_simulation(self):
         start = datetime.now()
         folder_name = self.results_manager.folder_name
@@ -90,21 +151,7 @@ class Simulation:
         self.current_step += 1
 
         while self.current_step <= self.to_step:
-            ants_results = self.time_measurement.run_function(
-                self.ants.move_all,
-                self.current_step,
-                self.pheromones,
-                self.foods,
-                self.nest,
-            )
-            self.time_measurement.run_function(
-                self.ants.spread_pheromones, self.pheromones
-            )
-
-            for _ in range(self.settings.NUMBER_OF_DIFFUSIONS_IN_STEP):
-                self.time_measurement.run_function(self.pheromones.diffuse)
-
-            self.nest.add_food_supplies()
+            ants_results = self.run_step()
 
             self.results_manager.save_step_in_thread(
                 self.current_step, ants_results, self
@@ -114,6 +161,7 @@ class Simulation:
 
         self.results_manager.save_final_results(self.get_results())
         self.threads_management.join()
+        self.pheromones.close()
 
         additional_times = {"calculation_duration": str(datetime.now() - start)}
         self.time_measurement.print_durations(folder_name, additional_times)
@@ -17,6 +17,7 @@ class SimulationHandler:
         number_of_steps: int,
         random_variable_values=None,
         ant_orientation_type=AntOrientationType.TWO_PHEROMONES,
+        random_seed: int = None,
     ):
         self.results_folder = results_folder
         self.props = props
@@ -25,12 +26,14 @@ class SimulationHandler:
         self.number_of_steps = number_of_steps
         self.random_variable_values = random_variable_values
         self.ant_orientation_type = ant_orientation_type
+        self.random_seed = random_seed
 
     def create_and_run_simulation(self):
         Simulation(
             number_of_steps=self.number_of_steps,
             settings=self.props,
             random_variable_values=self.random_variable_values,
+            random_seed=self.random_seed,
             simulation_folder_name=self.simulation_folder_name,
             simulation_name=self.simulation_name,
             results_folder=self.results_folder,
@@ -53,6 +56,13 @@ class SimulationFromGroup:
         self.only_general_pheromone = only_general_pheromone
         self.with_orientation = with_orientation
 
+    def get_ant_orientation_type(self):
+        if self.with_orientation:
+            return AntOrientationType.ONE_PHEROMONE_WITH_ORIENTATION
+        if self.only_general_pheromone:
+            return AntOrientationType.ONE_PHEROMONE
+        return AntOrientationType.TWO_PHEROMONES
+
 
 class SimulationGroup:
     def __init__(
@@ -87,8 +97,9 @@ class SimulationGroup:
         for i in range(1, self.repetitions + 1):
             try_make_dir(f"{self.results_folder}/results/{self.group_name}/{str(i)}")
 
-    def generate_random_variable_values(self, ants_number=250):
-        return np.random.normal(0, 1, ants_number * self.number_of_steps * 2).tolist()
+    @staticmethod
+    def generate_random_seed():
+        return int(np.random.randint(0, 2**63 - 1))
 
     def add_simulation(
         self,
@@ -110,7 +121,8 @@ class SimulationGroup:
 
     def create_simulations_to_run(self):
         for i in range(1, self.repetitions + 1):
-            random_variables = self.generate_random_variable_values()
+            # the same random values for all simulations in the repetition
+            random_seed = self.generate_random_seed()
             for simulation in self.simulation_group:
                 simulation_props = self.group_props.copy()
                 simulation_props.update(simulation.props)
@@ -125,9 +137,8 @@ class SimulationGroup:
                         simulation_name,
                         simulation.simulation_name,
                         self.number_of_steps,
-                        random_variables,
-                        only_general_pheromone=simulation.only_general_pheromone,
-                        with_orientation=simulation.with_orientation,
+                        ant_orientation_type=simulation.get_ant_orientation_type(),
+                        random_seed=random_seed,
                     )
                 )
 